@@ -12,6 +12,7 @@ if os.environ.get('VERCEL'):
 
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import json
 import uuid
 import time
@@ -23,6 +24,13 @@ import shutil
 app = Flask(__name__)
 CORS(app)
 
+# Number of reverse proxies in front of the app (e.g. 1 behind nginx). Only that many
+# rightmost X-Forwarded-For hops are trusted; with the default 0 the header is ignored,
+# since without a proxy it is entirely client-supplied.
+TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '0'))
+if TRUSTED_PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+
 # Configuration
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
 ALLOWED_EXTENSIONS = ['pdf', 'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx', 'jpg', 'jpeg', 'png']
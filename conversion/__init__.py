@@ -3,11 +3,18 @@ Enhanced conversion system for comprehensive file format conversions.
 Provides a unified interface for converting between various document, image, and data formats.
 """
 
-from .conversion_manager import ConversionManager
 from .engines.base_engine import ConversionEngine, ConversionError
 
 __all__ = ['ConversionManager', 'ConversionEngine', 'ConversionError']
 
+def __getattr__(name):
+    # Import the manager (and with it every engine's dependencies) on first use, so
+    # conversion pool workers importing a single engine don't load PIL and NumPy
+    if name == 'ConversionManager':
+        from .conversion_manager import ConversionManager
+        return ConversionManager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # Version info
 __version__ = '2.0.0'
 __author__ = 'DocSwap Team'
@@ -6,58 +6,498 @@ Optimized for performance with streaming, caching, and memory management.
 
 import os
 import logging
+import mmap
+import multiprocessing
 import gc
+import atexit
+import functools
+import hashlib
+import importlib.util
+import queue
+import re
+import shutil
+import stat
 import threading
-from typing import Dict, List, Optional, Any, Generator
+from typing import Dict, List, Optional, Any, Generator, Tuple
 from pathlib import Path
 import tempfile
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 import time
+from contextlib import contextmanager
 
 try:
-    from docx import Document
-    from docx.shared import Inches
-    DOCX_AVAILABLE = True
+    from markupsafe import escape as _markupsafe_escape
+    MARKUPSAFE_AVAILABLE = True
 except ImportError:
-    DOCX_AVAILABLE = False
+    MARKUPSAFE_AVAILABLE = False
 
-try:
+from .base_engine import ConversionEngine, ConversionError
+
+logger = logging.getLogger(__name__)
+
+# Heavy conversion libraries are imported on first use so engine start-up only
+# pays for the formats that are actually converted.
+@functools.lru_cache(maxsize=None)
+def _library_available(module_name: str) -> bool:
+    """Check whether a library is installed without importing it."""
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+def _docx_available() -> bool:
+    return _library_available('docx')
+
+def _pdf_available() -> bool:
+    return _library_available('PyPDF2')
+
+def _xlsx_available() -> bool:
+    return _library_available('openpyxl')
+
+def _reportlab_available() -> bool:
+    return _library_available('reportlab')
+
+def _pdf2docx_available() -> bool:
+    # PDF2DOCX functionality replaced with PyPDF2 + python-docx for Vercel compatibility
+    return _pdf_available() and _docx_available()
+
+@functools.lru_cache(maxsize=None)
+def _docx():
+    """Import python-docx on first use."""
+    import docx
+    return docx
+
+@functools.lru_cache(maxsize=None)
+def _pypdf2():
+    """Import PyPDF2 on first use."""
     import PyPDF2
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
+    return PyPDF2
 
-try:
+@functools.lru_cache(maxsize=None)
+def _openpyxl():
+    """Import openpyxl on first use."""
     import openpyxl
-    XLSX_AVAILABLE = True
-except ImportError:
-    XLSX_AVAILABLE = False
+    return openpyxl
 
-# PDF2DOCX functionality replaced with PyPDF2 + python-docx for Vercel compatibility
-PDF2DOCX_AVAILABLE = PDF_AVAILABLE and DOCX_AVAILABLE
+_HTML_HEADER = b'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>Document</title>\n</head>\n<body>\n'
+_HTML_FOOTER = b'</body>\n</html>\n'
 
-try:
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import letter
-    from reportlab.lib.units import inch
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
+# Same entities as markupsafe.escape so output doesn't depend on which one is installed
+_HTML_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&#34;',
+    "'": '&#39;',
+})
 
-from .base_engine import ConversionEngine, ConversionError
+_TXT_HTML_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Converted Document</title>
+    <style>
+        body { font-family: Arial, sans-serif; line-height: 1.6; margin: 40px; }
+        .content { max-width: 800px; margin: 0 auto; }
+        p { margin-bottom: 1em; }
+        pre { background-color: #f4f4f4; padding: 10px; border-radius: 4px; overflow-x: auto; }
+    </style>
+</head>
+<body>
+    <div class="content">
+"""
+_TXT_HTML_TAIL = """    </div>
+</body>
+</html>"""
 
-logger = logging.getLogger(__name__)
+_FINGERPRINT_CHUNK_SIZE = 1024 * 1024  # 1MB reads when hashing file contents
+_STALE_TEMP_SECONDS = 3600  # Staging files older than this were left by a crashed write
+
+# Recycled read buffers so hashing doesn't allocate a fresh 1MB bytes object per read
+_BUFFER_POOL: 'queue.LifoQueue[bytearray]' = queue.LifoQueue(maxsize=16)
+
+def _acquire_buffer() -> bytearray:
+    """Take a read buffer from the pool, or allocate one if the pool is empty."""
+    try:
+        return _BUFFER_POOL.get_nowait()
+    except queue.Empty:
+        return bytearray(_FINGERPRINT_CHUNK_SIZE)
+
+def _release_buffer(buf: bytearray) -> None:
+    """Return a read buffer to the pool; extra buffers are left to the garbage collector."""
+    try:
+        _BUFFER_POOL.put_nowait(buf)
+    except queue.Full:
+        pass
+
+def _stat(path: str) -> Tuple[float, int]:
+    """Return (mtime, size) for a file, used to invalidate parsed-document caches."""
+    stat = os.stat(path)
+    return stat.st_mtime, stat.st_size
+
+@functools.lru_cache(maxsize=256)
+def _fingerprint_cached(path: str, mtime: float, size: int) -> str:
+    """Digest the file contents once per (path, mtime, size), streamed in 1MB chunks."""
+    # Keys a cache shared across users, so this needs a collision-resistant hash
+    digest = hashlib.blake2b(digest_size=16)
+    buf = _acquire_buffer()
+    try:
+        view = memoryview(buf)
+        with open(path, 'rb', buffering=0) as f:
+            for n in iter(lambda: f.readinto(buf), 0):
+                digest.update(view[:n])
+    finally:
+        _release_buffer(buf)
+    return digest.hexdigest()
+
+def _fingerprint(path: str) -> str:
+    """Return a BLAKE2b digest of the file contents."""
+    return _fingerprint_cached(path, *_stat(path))
+
+def _copy_file(src: str, dst: str) -> None:
+    """
+    Copy src (bytes and permission bits) to a fresh inode at dst.
+    
+    The bytes go to a temp file beside dst that then replaces it, so a dst that is
+    hardlinked elsewhere (e.g. into the conversion cache) is never written through.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dst)), prefix='.docswap_')
+    os.close(fd)
+    try:
+        shutil.copy(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """
+    Hardlink src to dst when both are on one filesystem, otherwise copy the bytes.
+    
+    Either way dst is swapped in with os.replace, never opened for writing, so a file
+    another worker has linked to the old dst is left untouched.
+    """
+    tmp_path = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        _copy_file(src, dst)
+        return
+    try:
+        os.replace(tmp_path, dst)
+    except BaseException:
+        _remove_if_exists(tmp_path)
+        raise
+
+def _remove_if_exists(path: str) -> None:
+    """Remove a file that another worker sharing the cache directory may already have removed."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+@contextmanager
+def _open_pdf(path: str):
+    """Yield a PdfReader for path, closing the file when done."""
+    with open(path, 'rb') as pdf_file:
+        yield _pypdf2().PdfReader(pdf_file)
+
+def _iter_paragraphs(doc) -> Generator[Any, None, None]:
+    """Yield a DOCX's top-level paragraphs one at a time instead of building doc.paragraphs."""
+    from docx.oxml.ns import qn
+    from docx.text.paragraph import Paragraph
+    
+    for p_elem in doc.element.body.iterchildren(qn('w:p')):
+        yield Paragraph(p_elem, doc)
+
+_PROCESS_POOL: Optional[ProcessPoolExecutor] = None
+_PROCESS_POOL_LOCK = threading.Lock()
+_PROCESS_POOL_FORMATS = {'pdf', 'docx'}  # CPU-bound parsers that benefit from separate processes
+_IN_CONVERSION_WORKER = False
+
+def _init_conversion_worker() -> None:
+    """Mark the current process as a pool worker so conversions run inline instead of nesting pools."""
+    global _IN_CONVERSION_WORKER
+    _IN_CONVERSION_WORKER = True
+
+def _pool_mp_context():
+    """
+    Start method for pool workers.
+    
+    The pool is created lazily from a request thread of a multi-threaded (gthread)
+    worker, and a plain fork there can copy a logging/import/cache lock held by
+    another thread into the child. forkserver (or spawn) children start clean.
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    # Import this module (and none of the image stack) once in the server, so each worker
+    # forks with only the document engine's dependencies loaded
+    context.set_forkserver_preload([__name__])
+    return context
+
+@functools.lru_cache(maxsize=1)
+def _pool_size() -> int:
+    """
+    Processes in each web worker's conversion pool.
+    
+    Every gunicorn worker (WEB_CONCURRENCY, one per core by default) has its own pool, so
+    the cores are split between them. CONVERSION_WORKERS sets the size explicitly.
+    """
+    configured = os.environ.get('CONVERSION_WORKERS')
+    if configured:
+        return max(1, int(configured))
+    cpu_count = os.cpu_count() or 1
+    web_workers = max(1, int(os.environ.get('WEB_CONCURRENCY', cpu_count)))
+    return max(1, min(4, cpu_count // web_workers))
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Lazily create the process pool shared by all DocumentEngine instances."""
+    global _PROCESS_POOL
+    with _PROCESS_POOL_LOCK:
+        if _PROCESS_POOL is None:
+            _PROCESS_POOL = ProcessPoolExecutor(max_workers=_pool_size(),
+                                                mp_context=_pool_mp_context(),
+                                                initializer=_init_conversion_worker)
+            atexit.register(_PROCESS_POOL.shutdown)
+        return _PROCESS_POOL
+
+def _discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool (a worker was killed, e.g. by the OOM killer) so the next use creates a new one."""
+    global _PROCESS_POOL
+    with _PROCESS_POOL_LOCK:
+        if _PROCESS_POOL is pool:
+            _PROCESS_POOL = None
+    pool.shutdown(wait=False)
+
+def _pool_submit(fn, *args) -> Tuple[ProcessPoolExecutor, Future]:
+    """Submit a job to the shared pool, replacing it first if it is already broken."""
+    pool = _get_process_pool()
+    try:
+        return pool, pool.submit(fn, *args)
+    except BrokenProcessPool:
+        _discard_process_pool(pool)
+        pool = _get_process_pool()
+        return pool, pool.submit(fn, *args)
+
+def _submit_to_pool(fn, *args) -> Future:
+    return _pool_submit(fn, *args)[1]
+
+def _run_in_pool(fn, *args):
+    """
+    Run fn(*args) on the shared pool and return its result.
+    
+    If the pool breaks while the job is in flight, the pool is replaced and the job
+    retried once, so one killed worker fails at most this job, not every later one.
+    """
+    pool, future = _pool_submit(fn, *args)
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        logger.warning("Conversion worker process died; restarting the process pool")
+        _discard_process_pool(pool)
+        return _submit_to_pool(fn, *args).result()
+
+@functools.lru_cache(maxsize=None)
+def _worker_engine() -> 'DocumentEngine':
+    """One DocumentEngine per worker process."""
+    return DocumentEngine()
+
+def _do_convert(input_path: str, output_path: str, input_format: str,
+                output_format: str, options: Dict[str, Any]) -> bool:
+    """Run a conversion inside a worker process; only paths and options cross the pickle boundary."""
+    return _worker_engine()._dispatch_conversion(input_path, output_path, input_format, output_format, options)
+
+def _page_bounds(page_range: Optional[Tuple[int, int]]) -> Tuple[int, Optional[int]]:
+    """Translate a 1-based inclusive page range into 0-based [start, end) bounds."""
+    if page_range:
+        start_page, end_page = page_range
+        return start_page - 1, end_page
+    return 0, None
+
+def _pdf2docx_worker(input_path: str, output_path: str, start: int = 0, end: Optional[int] = None,
+                     title: bool = True) -> bool:
+    """
+    Convert pages [start, end) of a PDF to DOCX.
+    
+    Module-level so it can be pickled and run in a worker process. Shards after
+    the first pass title=False so the merged document has a single title heading.
+    """
+    try:
+        # Extract text from PDF using PyPDF2
+        text_content = []
+        
+        with open(input_path, 'rb') as pdf_file:
+            pdf_reader = _pypdf2().PdfReader(pdf_file)
+            total_pages = len(pdf_reader.pages)
+            pages_to_process = range(start, total_pages if end is None else min(end, total_pages))
+            
+            logger.info(f"Processing {len(pages_to_process)} pages")
+            
+            for page_num in pages_to_process:
+                try:
+                    page = pdf_reader.pages[page_num]
+                    page_text = page.extract_text()
+                    
+                    if page_text.strip():
+                        text_content.append(f"--- Page {page_num + 1} ---\n{page_text}\n")
+                    else:
+                        text_content.append(f"--- Page {page_num + 1} ---\n[No extractable text]\n")
+                        
+                except Exception as e:
+                    logger.warning(f"Failed to extract text from page {page_num + 1}: {str(e)}")
+                    text_content.append(f"--- Page {page_num + 1} ---\n[Text extraction failed]\n")
+        
+        # Create DOCX document
+        doc = _docx().Document()
+        if title:
+            doc.add_heading('PDF Content', 0)
+        
+        # Add extracted text to document
+        full_text = '\n'.join(text_content)
+        
+        # Split into paragraphs and add to document
+        paragraphs = full_text.split('\n')
+        for paragraph in paragraphs:
+            if paragraph.strip():
+                if paragraph.startswith('--- Page'):
+                    # Add page headers as headings
+                    doc.add_heading(paragraph.strip(), level=2)
+                else:
+                    # Add regular text as paragraphs
+                    doc.add_paragraph(paragraph)
+        
+        # Save the document
+        doc.save(output_path)
+        
+        # Verify output file was created and has content
+        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            output_size = os.path.getsize(output_path)
+            logger.info(f"Successfully converted PDF to DOCX (output: {output_size/1024/1024:.1f}MB)")
+            return True
+        else:
+            logger.error("PDF to DOCX conversion produced empty file")
+            return False
+            
+    except Exception as e:
+        logger.error(f"PDF to DOCX conversion failed: {str(e)}")
+        # Clean up partial files
+        if os.path.exists(output_path):
+            try:
+                os.remove(output_path)
+            except:
+                pass
+        # Free the half-built document right away rather than waiting for a generation-2 pass
+        gc.collect()
+        return False
+
+_PDF2DOCX_MIN_SHARD_PAGES = 25  # Smaller PDFs aren't worth splitting across processes
+_PDF2DOCX_CHUNK_PAGES = 20  # Pages per part for large PDFs, bounding each part's extraction
+
+def _pdf_page_count(path: str) -> int:
+    """Count PDF pages without extracting any text."""
+    with open(path, 'rb') as pdf_file:
+        return len(_pypdf2().PdfReader(pdf_file).pages)
+
+def _shard_pages(start: int, end: int, shards: int) -> List[Tuple[int, int]]:
+    """Split pages [start, end) into roughly equal contiguous slices."""
+    total = end - start
+    bounds = []
+    for i in range(shards):
+        shard_start = start + total * i // shards
+        shard_end = start + total * (i + 1) // shards
+        if shard_end > shard_start:
+            bounds.append((shard_start, shard_end))
+    return bounds
+
+def _chunk_pages(start: int, end: int, size: int) -> List[Tuple[int, int]]:
+    """Split pages [start, end) into consecutive slices of at most size pages."""
+    return [(chunk_start, min(chunk_start + size, end)) for chunk_start in range(start, end, size)]
+
+def _merge_docx_parts(part_paths: List[str], output_path: str) -> None:
+    """Append the body content of each DOCX part to the first one and save it as output_path."""
+    merged = _docx().Document(part_paths[0])
+    body = merged.element.body
+    sect_pr = body.sectPr
+    for part_path in part_paths[1:]:
+        part = _docx().Document(part_path)
+        for element in part.element.body:
+            if element.tag.endswith('}sectPr'):
+                continue
+            if sect_pr is not None:
+                sect_pr.addprevious(element)
+            else:
+                body.append(element)
+    merged.save(output_path)
+
+# Two consecutive newlines in any convention, matching text mode's universal newlines
+_PARAGRAPH_BREAK_RE = re.compile(rb'(?:\r\n|\r(?!\n)|\n){2}')
+
+def _iter_text_paragraphs(path: str) -> Generator[str, None, None]:
+    """
+    Yield the same chunks as reading the file in text mode and splitting on '\n\n'.
+    
+    The file is memory-mapped and each chunk is decoded on its own, so only one
+    paragraph at a time is held as a Python string.
+    """
+    def decode(chunk: bytes) -> str:
+        text = chunk.decode('utf-8')
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+    
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield ''  # mmap can't map an empty file
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = 0
+            for match in _PARAGRAPH_BREAK_RE.finditer(mm):
+                yield decode(mm[pos:match.start()])
+                pos = match.end()
+            yield decode(mm[pos:])
+
+def _iter_text_lines(text_file) -> Generator[str, None, None]:
+    """Yield the same lines as text_file.read().split('\n') while reading one line at a time."""
+    ended_with_newline = True
+    for line in text_file:
+        ended_with_newline = line.endswith('\n')
+        yield line[:-1] if ended_with_newline else line
+    if ended_with_newline:
+        yield ''
+
+_CONVERT_METHOD_RE = re.compile(r'^_convert_([a-z0-9]+)_to_([a-z0-9]+)$')
 
 class DocumentEngine(ConversionEngine):
     """Enhanced document conversion engine with comprehensive format support and performance optimization."""
     
+    _gc_tuned = False
+    
     def __init__(self):
         super().__init__("DocumentEngine")
-        self._conversion_cache = {}
+        if not DocumentEngine._gc_tuned:
+            # Conversions allocate many short-lived objects; a higher gen-0 threshold lets
+            # them die by refcount without triggering collections
+            gc.set_threshold(100_000, 50, 50)
+            DocumentEngine._gc_tuned = True
         self._cache_lock = threading.Lock()
+        self._cache_dir = Path(tempfile.gettempdir()) / 'docswap_cache'
+        self._cache_dir_checked = False
         self._max_cache_size = 50  # Maximum cached conversions
+        self._max_cache_bytes = 512 * 1024 * 1024  # Maximum total size of cached files
         self._chunk_size = 8192  # 8KB chunks for streaming
-        self._thread_pool = ThreadPoolExecutor(max_workers=2)  # Limit concurrent conversions
+    
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        """
+        Shared worker process pool, created on first use.
+        
+        PDF/DOCX backends are CPU-bound and not thread-safe, so concurrent work goes to
+        processes rather than a thread pool. The pool is shut down at interpreter exit.
+        """
+        return _get_process_pool()
     
     def _initialize_formats(self) -> None:
         """Initialize supported document formats and conversion matrix."""
@@ -65,15 +505,15 @@ class DocumentEngine(ConversionEngine):
         self.supported_outputs = []
         
         # Add formats based on available libraries
-        if PDF_AVAILABLE:
+        if _pdf_available():
             self.supported_inputs.extend(['pdf'])
             self.supported_outputs.extend(['pdf'])
         
-        if DOCX_AVAILABLE:
+        if _docx_available():
             self.supported_inputs.extend(['docx'])
             self.supported_outputs.extend(['docx', 'txt', 'html'])
         
-        if XLSX_AVAILABLE:
+        if _xlsx_available():
             self.supported_inputs.extend(['xlsx'])
             self.supported_outputs.extend(['xlsx', 'csv'])
         
@@ -83,39 +523,53 @@ class DocumentEngine(ConversionEngine):
         
         # Build conversion matrix
         self._build_conversion_matrix()
+        self._build_dispatch_table()
+    
+    def _build_dispatch_table(self) -> None:
+        """Map (input_format, output_format) to its bound _convert_<in>_to_<out> method once."""
+        self._dispatch = {}
+        for name in dir(self):
+            match = _CONVERT_METHOD_RE.match(name)
+            if match:
+                self._dispatch[match.groups()] = getattr(self, name)
     
     def _build_conversion_matrix(self) -> None:
         """Build the conversion matrix based on available libraries."""
         # PDF conversions
-        if PDF_AVAILABLE:
+        if _pdf_available():
             self.conversion_matrix['pdf'] = ['txt']  # Basic text extraction
-            if DOCX_AVAILABLE:
+            if _docx_available():
                 self.conversion_matrix['pdf'].append('docx')
         
         # DOCX conversions
-        if DOCX_AVAILABLE:
+        if _docx_available():
             self.conversion_matrix['docx'] = ['txt', 'html']
         
         # XLSX conversions
-        if XLSX_AVAILABLE:
+        if _xlsx_available():
             self.conversion_matrix['xlsx'] = ['csv', 'txt', 'html']
-            if PDF_AVAILABLE:
+            if _pdf_available():
                 self.conversion_matrix['xlsx'].append('pdf')
         
         # Text format conversions
         self.conversion_matrix['txt'] = ['html']
-        if DOCX_AVAILABLE:
+        if _docx_available():
             self.conversion_matrix['txt'].append('docx')
-        if REPORTLAB_AVAILABLE:
+        if _reportlab_available():
             self.conversion_matrix['txt'].append('pdf')
         
         self.conversion_matrix['html'] = ['txt']
-        if DOCX_AVAILABLE:
+        if _docx_available():
             self.conversion_matrix['html'].append('docx')
         
         self.conversion_matrix['csv'] = ['txt', 'html']
-        if XLSX_AVAILABLE:
+        if _xlsx_available():
             self.conversion_matrix['csv'].append('xlsx')
+        
+        # Same-format conversions are handled by the copy fast path in convert()
+        for fmt in self.conversion_matrix:
+            if fmt in self.supported_outputs:
+                self.conversion_matrix[fmt].append(fmt)
     
     def convert(self, input_path: str, output_path: str, 
                 input_format: str, output_format: str, 
@@ -144,24 +598,31 @@ class DocumentEngine(ConversionEngine):
                     output_format=output_format
                 )
             
+            # Same-format "conversions" are a plain copy; skip parsing and cache hashing.
+            # Not a hardlink: the output is handed to the user and must not share the input's inode.
+            if input_format == output_format:
+                if os.path.abspath(input_path) != os.path.abspath(output_path):
+                    _copy_file(input_path, output_path)
+                return True
+            
             # Check cache if enabled
             if options.get('use_cache', True):
                 cache_key = self._get_cache_key(input_path, output_format, options)
                 cached_result = self._get_from_cache(cache_key)
-                if cached_result and os.path.exists(cached_result):
+                if cached_result:
                     logger.info(f"Using cached conversion result: {cached_result}")
-                    # Copy cached file to output path
-                    import shutil
-                    shutil.copy2(cached_result, output_path)
-                    return True
+                    # Copy, don't link: writes to the output must not reach the cache entry
+                    try:
+                        _copy_file(cached_result, output_path)
+                        return True
+                    except FileNotFoundError:
+                        # Evicted by another worker since the lookup; convert afresh
+                        pass
             
             # Get file size for optimization decisions
             file_size = os.path.getsize(input_path)
             is_large_file = file_size > 5 * 1024 * 1024  # 5MB threshold
             
-            # Route to appropriate conversion method
-            conversion_key = f"{input_format}_to_{output_format}"
-            
             # Add performance options
             perf_options = options.copy()
             perf_options.update({
@@ -170,20 +631,16 @@ class DocumentEngine(ConversionEngine):
                 'streaming': options.get('streaming', True)
             })
             
-            success = False
-            if hasattr(self, f"_convert_{conversion_key}"):
-                success = getattr(self, f"_convert_{conversion_key}")(input_path, output_path, perf_options)
-            else:
-                success = self._generic_convert(input_path, output_path, input_format, output_format, perf_options)
+            # Start from a fresh inode so a hardlinked cache entry is never written through
+            if os.path.lexists(output_path) and os.path.abspath(output_path) != os.path.abspath(input_path):
+                os.remove(output_path)
+            
+            success = self._run_conversion(input_path, output_path, input_format, output_format, perf_options)
             
             # Cache successful conversion if enabled
             if success and options.get('use_cache', True):
                 self._add_to_cache(cache_key, output_path)
             
-            # Force garbage collection for large files
-            if is_large_file:
-                gc.collect()
-            
             conversion_time = time.time() - start_time
             logger.info(f"Conversion completed in {conversion_time:.2f}s (file size: {file_size/1024/1024:.1f}MB)")
             
@@ -193,115 +650,167 @@ class DocumentEngine(ConversionEngine):
             logger.error(f"Document conversion failed: {str(e)}")
             raise ConversionError(f"Document conversion failed: {str(e)}", engine=self.name)
     
+    def _run_conversion(self, input_path: str, output_path: str,
+                        input_format: str, output_format: str, options: Dict[str, Any]) -> bool:
+        """Run a conversion, sending CPU-bound PDF/DOCX work to the process pool."""
+        use_pool = (
+            not _IN_CONVERSION_WORKER
+            and input_format != output_format
+            # PDF to DOCX submits its own page shards to the pool
+            and (input_format, output_format) != ('pdf', 'docx')
+            and (input_format in _PROCESS_POOL_FORMATS or output_format in _PROCESS_POOL_FORMATS)
+        )
+        if use_pool:
+            return _run_in_pool(_do_convert, input_path, output_path, input_format, output_format, options)
+        return self._dispatch_conversion(input_path, output_path, input_format, output_format, options)
+    
+    def _dispatch_conversion(self, input_path: str, output_path: str,
+                             input_format: str, output_format: str, options: Dict[str, Any]) -> bool:
+        """Route to the appropriate conversion method."""
+        convert_fn = self._dispatch.get((input_format, output_format))
+        if convert_fn is not None:
+            return convert_fn(input_path, output_path, options)
+        return self._generic_convert(input_path, output_path, input_format, output_format, options)
+    
     def _get_cache_key(self, input_path: str, output_format: str, options: Dict[str, Any]) -> str:
-        """Generate a cache key for the conversion."""
-        import hashlib
-        
-        # Get file modification time and size for cache invalidation
-        stat = os.stat(input_path)
-        file_info = f"{stat.st_mtime}_{stat.st_size}"
+        """
+        Generate a content-addressed cache key for the conversion.
         
-        # Create hash of input path, output format, and relevant options
-        cache_data = f"{input_path}_{output_format}_{file_info}"
+        Keying on the file contents rather than its path lets repeated conversions
+        of the same document (e.g. re-uploads) hit the cache.
+        """
+        cache_key = f"{_fingerprint(input_path)}_{output_format}"
         
         # Include relevant options in cache key
         relevant_options = {k: v for k, v in options.items() 
                           if k in ['preserve_formatting', 'extract_images', 'page_range']}
         if relevant_options:
-            cache_data += f"_{str(sorted(relevant_options.items()))}"
+            options_data = str(sorted(relevant_options.items())).encode()
+            cache_key += f"_{hashlib.blake2b(options_data, digest_size=8).hexdigest()}"
         
-        return hashlib.md5(cache_data.encode()).hexdigest()
+        return cache_key
     
     def _get_from_cache(self, cache_key: str) -> Optional[str]:
-        """Get cached conversion result."""
+        """
+        Return the cached result for cache_key, or None on a miss.
+        
+        The directory itself is the index, so results written by other workers or earlier
+        runs are found too. Cache files are only ever replaced, never rewritten in place.
+        A hit bumps the file's atime, which pruning uses as its LRU order.
+        """
         with self._cache_lock:
-            return self._conversion_cache.get(cache_key)
+            cache_file = str(self._private_cache_dir() / cache_key)
+        try:
+            st = os.stat(cache_file)
+            if not st.st_size:
+                # No conversion produces an empty result; drop it
+                _remove_if_exists(cache_file)
+                return None
+            os.utime(cache_file, ns=(time.time_ns(), st.st_mtime_ns))
+        except FileNotFoundError:
+            return None
+        return cache_file
     
     def _add_to_cache(self, cache_key: str, output_path: str) -> None:
         """Add conversion result to cache."""
         with self._cache_lock:
-            # Create cache directory if it doesn't exist
-            cache_dir = os.path.join(tempfile.gettempdir(), 'docswap_cache')
-            os.makedirs(cache_dir, exist_ok=True)
-            
-            # Copy file to cache with unique name
-            cache_file = os.path.join(cache_dir, f"{cache_key}_{os.path.basename(output_path)}")
-            import shutil
-            shutil.copy2(output_path, cache_file)
-            
-            # Add to cache
-            self._conversion_cache[cache_key] = cache_file
-            
-            # Limit cache size
-            if len(self._conversion_cache) > self._max_cache_size:
-                # Remove oldest entry
-                oldest_key = next(iter(self._conversion_cache))
-                old_file = self._conversion_cache.pop(oldest_key)
-                if os.path.exists(old_file):
-                    os.remove(old_file)
+            # Link (or copy) file into the cache under its content key
+            _link_or_copy(output_path, str(self._private_cache_dir() / cache_key))
+            self._prune_cache_dir()
+    
+    def _private_cache_dir(self) -> Path:
+        """
+        Return the cache directory, creating it owner-only; the caller must hold _cache_lock.
+        
+        The default path in the shared temp dir is predictable, so a directory (or symlink)
+        that another user put there first is not used: results go to a fresh mkdtemp()
+        directory instead, and nothing planted on disk is ever adopted.
+        """
+        if not self._cache_dir_checked:
+            try:
+                self._cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+                st = os.lstat(self._cache_dir)
+                # Anything another user could have written into can't be trusted
+                private = (stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid()
+                           and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH))
+                if private and st.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+                    os.chmod(self._cache_dir, 0o700)
+            except OSError:
+                private = False
+            if not private:
+                logger.warning(f"Cache directory {self._cache_dir} is not private to this user; "
+                               f"using a temporary one")
+                self._cache_dir = Path(tempfile.mkdtemp(prefix='docswap_cache_'))
+            self._cache_dir_checked = True
+        return self._cache_dir
+    
+    def _prune_cache_dir(self) -> None:
+        """
+        Remove least recently used results until the directory is within its count and byte limits.
+        
+        All workers share the directory, so the limits apply to what is on disk, not to what this
+        process wrote; results left by recycled workers age out like any other.
+        """
+        entries = []
+        now = time.time()
+        with os.scandir(self._cache_dir) as it:
+            for entry in it:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                if not stat.S_ISREG(st.st_mode):
+                    continue
+                if entry.name.startswith('.') or entry.name.endswith('.tmp'):
+                    # Staging file of a write in progress; only clear out ones a crash left behind
+                    if now - st.st_mtime > _STALE_TEMP_SECONDS:
+                        _remove_if_exists(entry.path)
+                    continue
+                entries.append((st.st_atime, st.st_size, entry.path))
+        
+        count = len(entries)
+        total_bytes = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if count <= self._max_cache_size and total_bytes <= self._max_cache_bytes:
+                break
+            _remove_if_exists(path)
+            count -= 1
+            total_bytes -= size
     
     def _convert_pdf_to_txt(self, input_path: str, output_path: str, options: Dict[str, Any]) -> bool:
         """Extract text from PDF with optimized performance."""
-        if not PDF_AVAILABLE:
+        if not _pdf_available():
             return False
         
         try:
-            is_large_file = options.get('is_large_file', False)
-            streaming = options.get('streaming', True)
-            
-            with open(input_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                total_pages = len(pdf_reader.pages)
-                
+            with _open_pdf(input_path) as pdf_reader:
+                # Slice the lazy page list so only the requested pages are resolved
                 page_range = options.get('page_range')
                 if page_range:
-                    start_page, end_page = page_range
-                    pages = range(start_page - 1, min(end_page, total_pages))
+                    first_page = page_range[0]
+                    pages = pdf_reader.pages[page_range[0] - 1:page_range[1]]
                 else:
-                    pages = range(total_pages)
+                    first_page = 1
+                    pages = pdf_reader.pages
                 
-                # For large files or when streaming is enabled, process pages in chunks
-                if is_large_file and streaming:
-                    with open(output_path, 'w', encoding='utf-8') as output_file:
-                        chunk_size = 10  # Process 10 pages at a time
-                        for i in range(0, len(pages), chunk_size):
-                            chunk_pages = pages[i:i + chunk_size]
-                            chunk_text = []
-                            
-                            for page_num in chunk_pages:
-                                try:
-                                    page = pdf_reader.pages[page_num]
-                                    text = page.extract_text()
-                                    if text.strip():  # Only add non-empty text
-                                        chunk_text.append(text)
-                                except Exception as e:
-                                    logger.warning(f"Failed to extract text from page {page_num + 1}: {str(e)}")
-                                    continue
-                            
-                            if chunk_text:
-                                output_file.write('\n\n'.join(chunk_text))
-                                if i + chunk_size < len(pages):  # Not the last chunk
-                                    output_file.write('\n\n')
-                                output_file.flush()  # Ensure data is written
-                            
-                            # Force garbage collection for large files
-                            if is_large_file:
-                                gc.collect()
-                else:
-                    # Standard processing for smaller files
-                    text_content = []
-                    for page_num in pages:
+                # Write each page as soon as it is extracted so memory stays at one page
+                with open(output_path, 'w', encoding='utf-8', buffering=1024 * 1024) as output_file:
+                    write = output_file.write
+                    wrote_text = False
+                    for page_num, page in enumerate(pages, first_page):
                         try:
-                            page = pdf_reader.pages[page_num]
                             text = page.extract_text()
-                            if text.strip():  # Only add non-empty text
-                                text_content.append(text)
                         except Exception as e:
-                            logger.warning(f"Failed to extract text from page {page_num + 1}: {str(e)}")
+                            logger.warning(f"Failed to extract text from page {page_num}: {str(e)}")
                             continue
-                    
-                    with open(output_path, 'w', encoding='utf-8') as output_file:
-                        output_file.write('\n\n'.join(text_content))
+                        # Only add non-empty text; isspace() avoids allocating a stripped copy
+                        if not text or text.isspace():
+                            continue
+                        if wrote_text:
+                            write('\n\n')
+                        write(text)
+                        wrote_text = True
                 
                 logger.info(f"Successfully extracted text from {len(pages)} pages")
                 return True
@@ -311,105 +820,139 @@ class DocumentEngine(ConversionEngine):
             return False
     
     def _convert_pdf_to_docx(self, input_path: str, output_path: str, options: Dict[str, Any]) -> bool:
-        """Convert PDF to DOCX using PyPDF2 + python-docx (Vercel-compatible)."""
-        if not PDF2DOCX_AVAILABLE:
+        """Convert PDF to DOCX using PyPDF2 + python-docx (Vercel-compatible).
+        
+        The conversion is CPU-bound pure Python, so it runs in a worker process
+        to let concurrent conversions use separate cores instead of sharing the GIL.
+        """
+        if not _pdf2docx_available():
             logger.error("PyPDF2 or python-docx library not available")
             return False
         
+        file_size = options.get('file_size', 0)
+        logger.info(f"Starting PDF to DOCX conversion (file size: {file_size/1024/1024:.1f}MB)")
+        
+        start, end = _page_bounds(options.get('page_range'))
         try:
-            is_large_file = options.get('is_large_file', False)
-            file_size = options.get('file_size', 0)
-            
-            logger.info(f"Starting PDF to DOCX conversion (file size: {file_size/1024/1024:.1f}MB)")
+            total_pages = _pdf_page_count(input_path)
+            end = total_pages if end is None else min(end, total_pages)
             
-            # Extract text from PDF using PyPDF2
-            text_content = []
+            if options.get('is_large_file') and end - start > _PDF2DOCX_CHUNK_PAGES:
+                # Fixed-size parts keep the text and document held by any one worker small
+                bounds = _chunk_pages(start, end, _PDF2DOCX_CHUNK_PAGES)
+                return self._convert_pdf_to_docx_sharded(input_path, output_path, bounds)
             
-            with open(input_path, 'rb') as pdf_file:
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
-                
-                # Get page range if specified
-                page_range = options.get('page_range')
-                if page_range:
-                    start_page, end_page = page_range
-                    pages_to_process = range(start_page - 1, min(end_page, len(pdf_reader.pages)))
-                else:
-                    pages_to_process = range(len(pdf_reader.pages))
-                
-                logger.info(f"Processing {len(pages_to_process)} pages")
-                
-                for page_num in pages_to_process:
-                    try:
-                        page = pdf_reader.pages[page_num]
-                        page_text = page.extract_text()
-                        
-                        if page_text.strip():
-                            text_content.append(f"--- Page {page_num + 1} ---\n{page_text}\n")
-                        else:
-                            text_content.append(f"--- Page {page_num + 1} ---\n[No extractable text]\n")
-                            
-                    except Exception as e:
-                        logger.warning(f"Failed to extract text from page {page_num + 1}: {str(e)}")
-                        text_content.append(f"--- Page {page_num + 1} ---\n[Text extraction failed]\n")
-            
-            # Create DOCX document
-            doc = Document()
-            doc.add_heading('PDF Content', 0)
+            if _IN_CONVERSION_WORKER:
+                # Already in a worker process; convert here rather than nesting pools
+                return _pdf2docx_worker(input_path, output_path, start, end)
             
-            # Add extracted text to document
-            full_text = '\n'.join(text_content)
+            shards = min(_pool_size(), max(1, (end - start) // _PDF2DOCX_MIN_SHARD_PAGES))
+            if shards <= 1:
+                return _run_in_pool(_pdf2docx_worker, input_path, output_path, start, end)
             
-            # Split into paragraphs and add to document
-            paragraphs = full_text.split('\n')
-            for paragraph in paragraphs:
-                if paragraph.strip():
-                    if paragraph.startswith('--- Page'):
-                        # Add page headers as headings
-                        doc.add_heading(paragraph.strip(), level=2)
-                    else:
-                        # Add regular text as paragraphs
-                        doc.add_paragraph(paragraph)
+            return self._convert_pdf_to_docx_sharded(input_path, output_path, _shard_pages(start, end, shards))
+        except Exception as e:
+            logger.error(f"PDF to DOCX worker failed: {str(e)}")
+            return False
+    
+    def _convert_pdf_to_docx_sharded(self, input_path: str, output_path: str,
+                                     bounds: List[Tuple[int, int]]) -> bool:
+        """
+        Convert page slices of a PDF separately, then merge the parts.
+        
+        Slices run in parallel on the process pool, or one after another when
+        already inside a pool worker.
+        """
+        logger.info(f"Splitting PDF to DOCX conversion into {len(bounds)} parts")
+        part_dir = tempfile.mkdtemp(prefix='docswap_pdf2docx_')
+        try:
+            part_paths = [os.path.join(part_dir, f"part_{i:03d}.docx") for i in range(len(bounds))]
+            jobs = [(input_path, part_path, part_start, part_end, i == 0)
+                    for i, (part_path, (part_start, part_end)) in enumerate(zip(part_paths, bounds))]
             
-            # Save the document
-            doc.save(output_path)
+            if _IN_CONVERSION_WORKER:
+                results = [_pdf2docx_worker(*job) for job in jobs]
+            else:
+                futures = [_submit_to_pool(_pdf2docx_worker, *job) for job in jobs]
+                results = []
+                for job, future in zip(jobs, futures):
+                    try:
+                        results.append(future.result())
+                    except BrokenProcessPool:
+                        # A worker died and took the pool with it; redo this part on a fresh pool
+                        results.append(_run_in_pool(_pdf2docx_worker, *job))
             
-            # Force garbage collection for large files
-            if is_large_file:
-                gc.collect()
+            if not all(results):
+                logger.error("PDF to DOCX conversion failed in one or more page ranges")
+                return False
             
-            # Verify output file was created and has content
-            if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                output_size = os.path.getsize(output_path)
-                logger.info(f"Successfully converted PDF to DOCX (output: {output_size/1024/1024:.1f}MB)")
-                return True
+            # The merge builds the whole output document in this process; only the per-part
+            # extraction above is bounded to _PDF2DOCX_CHUNK_PAGES pages
+            _merge_docx_parts(part_paths, output_path)
+            return os.path.exists(output_path) and os.path.getsize(output_path) > 0
+        finally:
+            shutil.rmtree(part_dir, ignore_errors=True)
+    
+    def convert_batch(self, jobs: List[Tuple[str, str, str, str]],
+                      options: Optional[Dict[str, Any]] = None) -> Dict[str, bool]:
+        """
+        Convert several files at once.
+        
+        Each job is a tuple (input_path, output_path, input_format, output_format).
+        PDF and DOCX jobs are submitted to the worker process pool together so they
+        convert in parallel; other jobs run in the calling thread.
+        
+        Returns:
+            Dict mapping each output path to its success flag.
+        """
+        options = options or {}
+        results = {}
+        futures = {}
+        
+        for input_path, output_path, input_format, output_format in jobs:
+            input_format = input_format.lower()
+            output_format = output_format.lower()
+            if (input_format != output_format
+                    and (input_format in _PROCESS_POOL_FORMATS or output_format in _PROCESS_POOL_FORMATS)
+                    and self.can_convert(input_format, output_format)):
+                future = _submit_to_pool(_do_convert, input_path, output_path,
+                                         input_format, output_format, options)
+                futures[future] = (input_path, output_path, input_format, output_format)
             else:
-                logger.error("PDF to DOCX conversion produced empty file")
-                return False
-                
-        except Exception as e:
-            logger.error(f"PDF to DOCX conversion failed: {str(e)}")
-            # Clean up partial files
-            if os.path.exists(output_path):
                 try:
-                    os.remove(output_path)
-                except:
-                    pass
-            return False
+                    results[output_path] = self.convert(input_path, output_path, input_format, output_format, options)
+                except ConversionError as e:
+                    logger.error(f"Batch conversion failed for {input_path}: {str(e)}")
+                    results[output_path] = False
+        
+        for future in as_completed(futures):
+            job = futures[future]
+            output_path = job[1]
+            try:
+                try:
+                    results[output_path] = future.result()
+                except BrokenProcessPool:
+                    # Only jobs lost with a dead worker are retried, each on a fresh pool
+                    results[output_path] = _run_in_pool(_do_convert, *job, options)
+            except Exception as e:
+                logger.error(f"Conversion worker failed for {output_path}: {str(e)}")
+                results[output_path] = False
+        
+        return results
     
     def _convert_docx_to_txt(self, input_path: str, output_path: str, options: Dict[str, Any]) -> bool:
         """Extract text from DOCX."""
-        if not DOCX_AVAILABLE:
+        if not _docx_available():
             return False
         
         try:
-            doc = Document(input_path)
-            text_content = []
-            
-            for paragraph in doc.paragraphs:
-                text_content.append(paragraph.text)
+            doc = _docx().Document(input_path)
             
             with open(output_path, 'w', encoding='utf-8') as output_file:
-                output_file.write('\n'.join(text_content))
+                for i, paragraph in enumerate(_iter_paragraphs(doc)):
+                    if i:
+                        output_file.write('\n')
+                    output_file.write(paragraph.text)
             
             return True
             
@@ -419,23 +962,23 @@ class DocumentEngine(ConversionEngine):
     
     def _convert_docx_to_html(self, input_path: str, output_path: str, options: Dict[str, Any]) -> bool:
         """Convert DOCX to HTML."""
-        if not DOCX_AVAILABLE:
+        if not _docx_available():
             return False
         
         try:
-            doc = Document(input_path)
-            html_content = ['<!DOCTYPE html>', '<html>', '<head>', 
-                          '<meta charset="utf-8">', '<title>Document</title>', 
-                          '</head>', '<body>']
-            
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    html_content.append(f'<p>{paragraph.text}</p>')
+            doc = _docx().Document(input_path)
             
-            html_content.extend(['</body>', '</html>'])
-            
-            with open(output_path, 'w', encoding='utf-8') as output_file:
-                output_file.write('\n'.join(html_content))
+            # Static markup is pre-encoded; only paragraph text is escaped and encoded per call
+            with open(output_path, 'wb') as output_file:
+                write = output_file.write
+                write(_HTML_HEADER)
+                for paragraph in _iter_paragraphs(doc):
+                    text = paragraph.text
+                    if text.strip():
+                        write(b'<p>')
+                        write(self._escape_html(text).encode('utf-8'))
+                        write(b'</p>\n')
+                write(_HTML_FOOTER)
             
             return True
             
@@ -445,21 +988,30 @@ class DocumentEngine(ConversionEngine):
     
     def _convert_txt_to_docx(self, input_path: str, output_path: str, options: Dict[str, Any]) -> bool:
         """Convert text to DOCX."""
-        if not DOCX_AVAILABLE:
+        if not _docx_available():
             return False
         
         try:
-            doc = Document()
+            from docx.oxml import OxmlElement
             
-            with open(input_path, 'r', encoding='utf-8') as input_file:
-                content = input_file.read()
+            doc = _docx().Document()
+            body = doc.element.body
+            sect_pr = body.sectPr
             
-            # Split into paragraphs
-            paragraphs = content.split('\n\n')
-            
-            for paragraph_text in paragraphs:
-                if paragraph_text.strip():
-                    doc.add_paragraph(paragraph_text.strip())
+            # Paragraphs are separated by blank lines. Build the w:p/w:r elements directly,
+            # skipping add_paragraph's Paragraph/Run wrappers; CT_R.text still turns
+            # newlines and tabs into w:br/w:tab as add_paragraph does.
+            for paragraph_text in _iter_text_paragraphs(input_path):
+                paragraph_text = paragraph_text.strip()
+                if paragraph_text:
+                    p = OxmlElement('w:p')
+                    r = OxmlElement('w:r')
+                    r.text = paragraph_text
+                    p.append(r)
+                    if sect_pr is not None:
+                        sect_pr.addprevious(p)
+                    else:
+                        body.append(p)
             
             doc.save(output_path)
             return True
@@ -470,17 +1022,20 @@ class DocumentEngine(ConversionEngine):
     
     def _convert_txt_to_pdf(self, input_path: str, output_path: str, options: Dict[str, Any]) -> bool:
         """Convert text to PDF."""
-        if not REPORTLAB_AVAILABLE:
+        if not _reportlab_available():
             return False
         
         try:
-            # Read the text file
-            with open(input_path, 'r', encoding='utf-8') as input_file:
-                content = input_file.read()
+            from reportlab.pdfgen import canvas
+            from reportlab.lib.pagesizes import letter
+            from reportlab.pdfbase import pdfmetrics
             
             # Create PDF
             c = canvas.Canvas(output_path, pagesize=letter)
             width, height = letter
+            font_name = 'Helvetica'
+            font_size = 12
+            c.setFont(font_name, font_size)
             
             # Set up text formatting
             margin = 72  # 1 inch margin
@@ -488,39 +1043,56 @@ class DocumentEngine(ConversionEngine):
             max_width = width - 2 * margin
             y_position = height - margin
             
-            # Split content into lines
-            lines = content.split('\n')
+            # Measure ASCII text from the font's width table rather than calling into
+            # reportlab per candidate line; other text falls back to stringWidth
+            scale = 0.001 * font_size
+            ascii_widths = pdfmetrics.getFont(font_name).widths[:128]
+            string_width = c.stringWidth
             
-            for line in lines:
-                # Handle long lines by wrapping
-                if c.stringWidth(line) > max_width:
-                    words = line.split(' ')
-                    current_line = ''
-                    
-                    for word in words:
-                        test_line = current_line + (' ' if current_line else '') + word
-                        if c.stringWidth(test_line) <= max_width:
-                            current_line = test_line
-                        else:
-                            if current_line:
-                                c.drawString(margin, y_position, current_line)
-                                y_position -= line_height
-                                if y_position < margin:
-                                    c.showPage()
-                                    y_position = height - margin
-                            current_line = word
-                    
-                    if current_line:
-                        c.drawString(margin, y_position, current_line)
+            def text_width(text: str) -> float:
+                if text.isascii():
+                    return sum(map(ascii_widths.__getitem__, text.encode('ascii'))) * scale
+                return string_width(text)
+            
+            space_width = text_width(' ')
+            
+            # Read the text file a line at a time
+            with open(input_path, 'r', encoding='utf-8') as input_file:
+                for line in _iter_text_lines(input_file):
+                    # Handle long lines by wrapping
+                    if text_width(line) > max_width:
+                        words = line.split(' ')
+                        current_line = ''
+                        current_width = 0.0
+                        
+                        for word in words:
+                            # Grow the line width word by word instead of re-measuring it
+                            word_width = text_width(word)
+                            test_width = current_width + space_width + word_width if current_line else word_width
+                            if test_width <= max_width:
+                                current_line = current_line + ' ' + word if current_line else word
+                                current_width = test_width
+                            else:
+                                if current_line:
+                                    c.drawString(margin, y_position, current_line)
+                                    y_position -= line_height
+                                    if y_position < margin:
+                                        c.showPage()
+                                        y_position = height - margin
+                                current_line = word
+                                current_width = word_width
+                        
+                        if current_line:
+                            c.drawString(margin, y_position, current_line)
+                            y_position -= line_height
+                    else:
+                        c.drawString(margin, y_position, line)
                         y_position -= line_height
-                else:
-                    c.drawString(margin, y_position, line)
-                    y_position -= line_height
-                
-                # Check if we need a new page
-                if y_position < margin:
-                    c.showPage()
-                    y_position = height - margin
+                    
+                    # Check if we need a new page
+                    if y_position < margin:
+                        c.showPage()
+                        y_position = height - margin
             
             c.save()
             return True
@@ -532,58 +1104,29 @@ class DocumentEngine(ConversionEngine):
     def _convert_txt_to_html(self, input_path: str, output_path: str, options: Dict[str, Any]) -> bool:
         """Convert text to HTML."""
         try:
-            # Read the text file
-            with open(input_path, 'r', encoding='utf-8') as input_file:
-                content = input_file.read()
-            
-            # Create HTML structure
-            html_content = [
-                '<!DOCTYPE html>',
-                '<html lang="en">',
-                '<head>',
-                '    <meta charset="UTF-8">',
-                '    <meta name="viewport" content="width=device-width, initial-scale=1.0">',
-                '    <title>Converted Document</title>',
-                '    <style>',
-                '        body { font-family: Arial, sans-serif; line-height: 1.6; margin: 40px; }',
-                '        .content { max-width: 800px; margin: 0 auto; }',
-                '        p { margin-bottom: 1em; }',
-                '        pre { background-color: #f4f4f4; padding: 10px; border-radius: 4px; overflow-x: auto; }',
-                '    </style>',
-                '</head>',
-                '<body>',
-                '    <div class="content">'
-            ]
-            
-            # Process content - split into paragraphs and handle line breaks
-            paragraphs = content.split('\n\n')
-            
-            for paragraph in paragraphs:
-                if paragraph.strip():
-                    # Handle single line breaks within paragraphs
-                    lines = paragraph.strip().split('\n')
-                    if len(lines) == 1:
-                        # Single line paragraph
-                        html_content.append(f'        <p>{self._escape_html(lines[0])}</p>')
-                    else:
-                        # Multi-line paragraph - preserve line breaks
-                        html_content.append('        <p>')
-                        for i, line in enumerate(lines):
-                            if i > 0:
-                                html_content.append('            <br>')
-                            html_content.append(f'            {self._escape_html(line)}')
-                        html_content.append('        </p>')
-            
-            # Close HTML structure
-            html_content.extend([
-                '    </div>',
-                '</body>',
-                '</html>'
-            ])
-            
-            # Write HTML file
+            # Write HTML directly as each paragraph is processed
             with open(output_path, 'w', encoding='utf-8') as output_file:
-                output_file.write('\n'.join(html_content))
+                write = output_file.write
+                write(_TXT_HTML_HEAD)
+                
+                # Process content - split into paragraphs and handle line breaks
+                for paragraph in _iter_text_paragraphs(input_path):
+                    if paragraph.strip():
+                        # Handle single line breaks within paragraphs
+                        lines = paragraph.strip().split('\n')
+                        if len(lines) == 1:
+                            # Single line paragraph
+                            write(f'        <p>{self._escape_html(lines[0])}</p>\n')
+                        else:
+                            # Multi-line paragraph - preserve line breaks
+                            write('        <p>\n')
+                            for i, line in enumerate(lines):
+                                if i > 0:
+                                    write('            <br>\n')
+                                write(f'            {self._escape_html(line)}\n')
+                            write('        </p>\n')
+                
+                write(_TXT_HTML_TAIL)
             
             logger.info("Successfully converted text to HTML")
             return True
@@ -593,29 +1136,30 @@ class DocumentEngine(ConversionEngine):
             return False
     
     def _escape_html(self, text: str) -> str:
-        """Escape HTML special characters."""
-        return (text.replace('&', '&amp;')
-                   .replace('<', '&lt;')
-                   .replace('>', '&gt;')
-                   .replace('"', '&quot;')
-                   .replace("'", '&#x27;'))
+        """Escape HTML special characters in a single pass."""
+        if MARKUPSAFE_AVAILABLE:
+            return str(_markupsafe_escape(text))
+        return text.translate(_HTML_ESCAPE_TABLE)
     
     def _convert_xlsx_to_csv(self, input_path: str, output_path: str, options: Dict[str, Any]) -> bool:
         """Convert XLSX to CSV."""
-        if not XLSX_AVAILABLE:
+        if not _xlsx_available():
             return False
         
         try:
-            workbook = openpyxl.load_workbook(input_path)
-            worksheet = workbook.active
-            
-            import csv
-            with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
-                csv_writer = csv.writer(csvfile)
+            # Read-only mode streams rows instead of building a Cell object per cell
+            workbook = _openpyxl().load_workbook(input_path, read_only=True)
+            try:
+                worksheet = workbook.active
                 
-                for row in worksheet.iter_rows(values_only=True):
-                    csv_writer.writerow(row)
-            
+                import csv
+                with open(output_path, 'w', newline='', encoding='utf-8', buffering=1024 * 1024) as csvfile:
+                    csv_writer = csv.writer(csvfile)
+                    # Let the C writer drive the whole row loop
+                    csv_writer.writerows(worksheet.iter_rows(values_only=True))
+            finally:
+                # Read-only workbooks keep the archive open until closed
+                workbook.close()
             return True
             
         except Exception as e:
@@ -624,20 +1168,20 @@ class DocumentEngine(ConversionEngine):
     
     def _convert_csv_to_xlsx(self, input_path: str, output_path: str, options: Dict[str, Any]) -> bool:
         """Convert CSV to XLSX."""
-        if not XLSX_AVAILABLE:
+        if not _xlsx_available():
             return False
         
         try:
-            workbook = openpyxl.Workbook()
-            worksheet = workbook.active
+            # Write-only mode serializes each appended row instead of keeping the sheet in memory
+            workbook = _openpyxl().Workbook(write_only=True)
+            worksheet = workbook.create_sheet()
             
             import csv
             with open(input_path, 'r', encoding='utf-8') as csvfile:
                 csv_reader = csv.reader(csvfile)
                 
-                for row_num, row in enumerate(csv_reader, 1):
-                    for col_num, value in enumerate(row, 1):
-                        worksheet.cell(row=row_num, column=col_num, value=value)
+                for row in csv_reader:
+                    worksheet.append(row)
             
             workbook.save(output_path)
             return True
@@ -657,9 +1201,9 @@ class DocumentEngine(ConversionEngine):
     def get_available_features(self) -> Dict[str, bool]:
         """Get information about available features."""
         return {
-            'pdf_support': PDF_AVAILABLE,
-            'docx_support': DOCX_AVAILABLE,
-            'xlsx_support': XLSX_AVAILABLE,
+            'pdf_support': _pdf_available(),
+            'docx_support': _docx_available(),
+            'xlsx_support': _xlsx_available(),
             'text_extraction': True,
             'html_generation': True,
             'csv_support': True
@@ -5,7 +5,12 @@ Handles PDF to images, images to PDF, and image format conversions.
 
 import os
 import logging
-from typing import Dict, List, Optional, Any
+import functools
+import math
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple
 from PIL import Image, ImageSequence
 import io
 
@@ -28,6 +33,93 @@ from .base_engine import ConversionEngine, ConversionError
 
 logger = logging.getLogger(__name__)
 
+# Extensions that name the same encoding
+_FORMAT_ALIASES = {'jpg': 'jpeg', 'tif': 'tiff'}
+
+# Map format names to PIL-compatible format names
+_FORMAT_MAP = {
+    'jpg': 'JPEG',
+    'jpeg': 'JPEG',
+    'png': 'PNG',
+    'gif': 'GIF',
+    'bmp': 'BMP',
+    'tiff': 'TIFF',
+    'tif': 'TIFF',
+    'webp': 'WEBP'
+}
+_JPEG_FORMATS = frozenset({'jpg', 'jpeg'})
+
+# Default save options per format; options passed to convert() override them.
+# Progressive JPEG relies on libjpeg-turbo (standard on Debian/Ubuntu) for fast SIMD encoding.
+_SAVE_KW_JPEG = {'quality': 85, 'optimize': True, 'progressive': True, 'subsampling': 2}
+_SAVE_KW_PNG = {'optimize': True}
+_SAVE_KW_WEBP = {'quality': 80, 'method': 4}
+
+# Downscaling first reduces to this multiple of the target (JPEG draft / reduce), then LANCZOS
+_REDUCING_GAP = 2.0
+# Formats whose decoder can downscale while decoding (Image.draft)
+_DRAFT_FORMATS = frozenset({'JPEG', 'MPO'})
+
+# Images whose raw pixel data exceeds this are saved straight to disk instead of via a buffer
+_BUFFERED_SAVE_MAX_BYTES = 64 * 1024 * 1024
+
+def _render_parallelism() -> int:
+    """
+    pdftoppm processes and encoder threads for one PDF->image request.
+    
+    Several gunicorn workers (WEB_CONCURRENCY, one per core by default) render at once, so
+    a request uses at most its worker's share of the cores, and never more than 4.
+    """
+    cpu_count = os.cpu_count() or 1
+    web_workers = max(1, int(os.environ.get('WEB_CONCURRENCY', cpu_count)))
+    return max(1, min(4, cpu_count // web_workers))
+
+# Options that change the encoded output, so a same-format conversion must re-encode:
+# every encoder setting _save_image reads, plus the downscaling bounds
+_REENCODE_OPTIONS = frozenset(_SAVE_KW_JPEG).union(_SAVE_KW_PNG, _SAVE_KW_WEBP, ('max_width', 'max_height'))
+
+def _flatten_onto_white(img: Image.Image) -> Image.Image:
+    """Composite an image with an alpha channel (RGBA, LA, PA or transparent P) onto white, as RGB."""
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    background = Image.new('RGBA', img.size, (255, 255, 255, 255))
+    background.alpha_composite(img)
+    return background.convert('RGB')
+
+def _has_alpha(img: Image.Image) -> bool:
+    return img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+
+@functools.lru_cache(maxsize=1)
+def _format_tables() -> Tuple[List[str], List[str], Dict[str, List[str]]]:
+    """Build the supported formats and conversion matrix once per process."""
+    # Core image formats
+    image_formats = ['jpg', 'jpeg', 'png', 'tiff', 'tif', 'bmp', 'gif', 'webp']
+    supported_inputs: List[str] = []
+    supported_outputs: List[str] = []
+    
+    # Add PDF support if libraries are available
+    if PDF2IMAGE_AVAILABLE:
+        supported_inputs.append('pdf')
+    if IMG2PDF_AVAILABLE:
+        supported_outputs.append('pdf')
+    
+    supported_inputs.extend(image_formats)
+    supported_outputs.extend(image_formats)
+    
+    # Build conversion matrix
+    conversion_matrix: Dict[str, List[str]] = {}
+    for input_fmt in supported_inputs:
+        if input_fmt == 'pdf':
+            # PDF can convert to all image formats
+            conversion_matrix[input_fmt] = image_formats.copy()
+        else:
+            # Images can convert to other images and PDF
+            conversion_matrix[input_fmt] = image_formats.copy()
+            if IMG2PDF_AVAILABLE:
+                conversion_matrix[input_fmt].append('pdf')
+    
+    return supported_inputs, supported_outputs, conversion_matrix
+
 class ImageEngine(ConversionEngine):
     """Enhanced image conversion engine with comprehensive format support."""
     
@@ -36,30 +128,8 @@ class ImageEngine(ConversionEngine):
     
     def _initialize_formats(self) -> None:
         """Initialize supported image formats and conversion matrix."""
-        # Core image formats
-        image_formats = ['jpg', 'jpeg', 'png', 'tiff', 'tif', 'bmp', 'gif', 'webp']
-        
-        # Add PDF support if libraries are available
-        if PDF2IMAGE_AVAILABLE:
-            self.supported_inputs.append('pdf')
-        if IMG2PDF_AVAILABLE:
-            self.supported_outputs.append('pdf')
-        
-        self.supported_inputs.extend(image_formats)
-        self.supported_outputs.extend(image_formats)
-        
-        # Build conversion matrix
-        for input_fmt in self.supported_inputs:
-            self.conversion_matrix[input_fmt] = []
-            
-            if input_fmt == 'pdf':
-                # PDF can convert to all image formats
-                self.conversion_matrix[input_fmt] = image_formats.copy()
-            else:
-                # Images can convert to other images and PDF
-                self.conversion_matrix[input_fmt] = image_formats.copy()
-                if IMG2PDF_AVAILABLE:
-                    self.conversion_matrix[input_fmt].append('pdf')
+        # The tables never change after startup, so every engine in the process shares one copy
+        self.supported_inputs, self.supported_outputs, self.conversion_matrix = _format_tables()
     
     def convert(self, input_path: str, output_path: str, 
                 input_format: str, output_format: str, 
@@ -72,6 +142,9 @@ class ImageEngine(ConversionEngine):
             - dpi: DPI for PDF to image conversion (default: 200)
             - page_range: Tuple (start, end) for PDF pages
             - optimize: Boolean for image optimization
+            - max_width / max_height: Downscale images to fit within these bounds
+            - target_size: Render PDF pages at this size, as an int for the longest side
+              or a (width, height) tuple where either may be None to keep the aspect ratio
         """
         try:
             options = options or {}
@@ -86,6 +159,13 @@ class ImageEngine(ConversionEngine):
                     output_format=output_format
                 )
             
+            # Same format with no re-encoding options requested: copy the file as-is
+            if (_FORMAT_ALIASES.get(input_format, input_format) == _FORMAT_ALIASES.get(output_format, output_format)
+                    and not any(key in options for key in _REENCODE_OPTIONS)):
+                if os.path.abspath(input_path) != os.path.abspath(output_path):
+                    shutil.copyfile(input_path, output_path)
+                return True
+            
             if input_format == 'pdf':
                 return self._pdf_to_image(input_path, output_path, output_format, options)
             elif output_format == 'pdf':
@@ -106,25 +186,42 @@ class ImageEngine(ConversionEngine):
         try:
             dpi = options.get('dpi', 200)
             page_range = options.get('page_range')
+            parallelism = _render_parallelism()
             
-            # Convert PDF pages to images
-            if page_range:
-                first_page, last_page = page_range
-                images = pdf2image.convert_from_path(
-                    pdf_path, dpi=dpi, first_page=first_page, last_page=last_page
-                )
-            else:
-                images = pdf2image.convert_from_path(pdf_path, dpi=dpi)
-            
-            if len(images) == 1:
-                # Single page - save directly
-                self._save_image(images[0], output_path, output_format, options)
-            else:
-                # Multiple pages - save with page numbers
-                base_path = os.path.splitext(output_path)[0]
-                for i, image in enumerate(images, 1):
-                    page_output = f"{base_path}_page_{i:03d}.{output_format}"
-                    self._save_image(image, page_output, output_format, options)
+            # Rasterize pages with several pdftoppm processes, spooling them to a temp folder
+            with tempfile.TemporaryDirectory(prefix='docswap_pdf2image_') as temp_dir:
+                convert_kwargs = {
+                    'dpi': dpi,
+                    'thread_count': parallelism,
+                    'output_folder': temp_dir,
+                    'fmt': 'ppm',
+                    # Only return file paths so pages are decoded one at a time, not all held in RAM
+                    'paths_only': True,
+                }
+                if page_range:
+                    convert_kwargs['first_page'], convert_kwargs['last_page'] = page_range
+                # Let pdftoppm rasterize straight at the target size instead of resizing afterwards
+                if options.get('target_size'):
+                    convert_kwargs['size'] = options['target_size']
+                
+                # Convert PDF pages to images
+                page_paths = pdf2image.convert_from_path(pdf_path, **convert_kwargs)
+                
+                if len(page_paths) == 1:
+                    # Single page - save directly
+                    self._save_page_file(page_paths[0], output_path, output_format, options)
+                else:
+                    # Multiple pages - save with page numbers; PIL releases the GIL while encoding
+                    base_path = os.path.splitext(output_path)[0]
+                    with ThreadPoolExecutor(max_workers=parallelism) as save_pool:
+                        futures = [
+                            save_pool.submit(self._save_page_file, page_path,
+                                             f"{base_path}_page_{i:03d}.{output_format}",
+                                             output_format, options)
+                            for i, page_path in enumerate(page_paths, 1)
+                        ]
+                        for future in futures:
+                            future.result()
             
             return True
             
@@ -132,22 +229,36 @@ class ImageEngine(ConversionEngine):
             logger.error(f"PDF to image conversion failed: {str(e)}")
             return False
     
-    def _image_to_pdf(self, image_path: str, output_path: str, 
+    def _save_page_file(self, page_path: str, output_path: str,
+                        output_format: str, options: Dict[str, Any]) -> None:
+        """Encode one rasterized page file to the output format, then delete it."""
+        with Image.open(page_path) as image:
+            self._save_image(image, output_path, output_format, options)
+        os.unlink(page_path)
+    
+    def _image_to_pdf(self, image_path, output_path: str, 
                      options: Dict[str, Any]) -> bool:
-        """Convert image(s) to PDF."""
+        """Convert image(s) to PDF.
+        
+        Accepts a path, encoded image bytes, an open PIL image, or a list of these.
+        In-memory images are encoded once by _encode_pdf_page.
+        """
         if not IMG2PDF_AVAILABLE:
             raise ConversionError("img2pdf library not available", engine=self.name)
         
         try:
             # Handle single image or list of images
-            if isinstance(image_path, str):
-                image_paths = [image_path]
+            if isinstance(image_path, (str, bytes, Image.Image)):
+                images = [image_path]
             else:
-                image_paths = image_path
+                images = image_path
+            
+            images = [self._encode_pdf_page(img, options) if isinstance(img, Image.Image) else img
+                      for img in images]
             
             # Convert images to PDF with proper rotation handling
             with open(output_path, "wb") as f:
-                f.write(img2pdf.convert(image_paths, rotation=img2pdf.Rotation.ifvalid))
+                f.write(img2pdf.convert(images, rotation=img2pdf.Rotation.ifvalid))
             
             return True
             
@@ -155,11 +266,45 @@ class ImageEngine(ConversionEngine):
             logger.error(f"Image to PDF conversion failed: {str(e)}")
             return False
     
+    def _encode_pdf_page(self, img: Image.Image, options: Dict[str, Any]) -> bytes:
+        """
+        Encode an in-memory image as bytes img2pdf embeds without re-encoding.
+        
+        PDF pages have no alpha, so transparency is flattened onto white first. Images
+        decoded from JPEG go back in as JPEG; anything else is stored losslessly as PNG.
+        """
+        source_format = img.format
+        if _has_alpha(img):
+            img = _flatten_onto_white(img)
+        
+        buf = io.BytesIO()
+        if source_format == 'JPEG' and img.mode in ('RGB', 'L', 'CMYK'):
+            save_kwargs = _SAVE_KW_JPEG
+            if 'quality' in options:
+                save_kwargs = {**_SAVE_KW_JPEG, 'quality': options['quality']}
+            img.save(buf, 'JPEG', **save_kwargs)
+        else:
+            if img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            # Low zlib effort: img2pdf only copies the stream, so size matters less than speed
+            img.save(buf, 'PNG', compress_level=1)
+        return buf.getvalue()
+    
     def _image_to_image(self, input_path: str, output_path: str, 
                        output_format: str, options: Dict[str, Any]) -> bool:
         """Convert between image formats."""
         try:
             with Image.open(input_path) as img:
+                max_width = options.get('max_width')
+                max_height = options.get('max_height')
+                if (max_width or max_height) and img.format in _DRAFT_FORMATS:
+                    # Let libjpeg scale by 1/2, 1/4 or 1/8 in the DCT domain while decoding,
+                    # keeping reducing_gap times the target so the LANCZOS pass below has detail left
+                    ratio = min((max_width or img.width) / img.width, (max_height or img.height) / img.height)
+                    if ratio < 1:
+                        img.draft(None, (math.ceil(img.width * ratio * _REDUCING_GAP),
+                                         math.ceil(img.height * ratio * _REDUCING_GAP)))
+                
                 # Handle animated GIFs
                 if hasattr(img, 'is_animated') and img.is_animated and output_format != 'gif':
                     # Convert first frame for non-GIF outputs
@@ -173,15 +318,15 @@ class ImageEngine(ConversionEngine):
                     else:
                         img = img.convert('RGB')
                 
+                # Downscale in place before any further per-pixel work
+                if max_width or max_height:
+                    img.thumbnail((max_width or img.width, max_height or img.height),
+                                  Image.Resampling.LANCZOS, reducing_gap=_REDUCING_GAP)
+                
                 # Handle transparency for formats that don't support it
-                if output_format.lower() in ['jpg', 'jpeg'] and img.mode in ['RGBA', 'LA']:
-                    # Create white background for JPEG
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'RGBA':
-                        background.paste(img, mask=img.split()[-1])
-                    else:
-                        background.paste(img)
-                    img = background
+                if output_format in _JPEG_FORMATS and img.mode in ['RGBA', 'LA']:
+                    # Composite onto a white background for JPEG in a single pass
+                    img = _flatten_onto_white(img)
                 
                 self._save_image(img, output_path, output_format, options)
             
@@ -193,31 +338,43 @@ class ImageEngine(ConversionEngine):
     
     def _save_image(self, image: Image.Image, output_path: str, 
                    output_format: str, options: Dict[str, Any]) -> None:
-        """Save image with format-specific options."""
-        save_kwargs = {}
+        """Save image with format-specific options (output_format is already lowercase)."""
+        if output_format in _JPEG_FORMATS:
+            save_kwargs = _SAVE_KW_JPEG
+        elif output_format == 'png':
+            save_kwargs = _SAVE_KW_PNG
+        elif output_format == 'webp':
+            save_kwargs = _SAVE_KW_WEBP
+        else:
+            save_kwargs = {}
         
-        if output_format.lower() in ['jpg', 'jpeg']:
-            save_kwargs['quality'] = options.get('quality', 85)
-            save_kwargs['optimize'] = options.get('optimize', True)
-        elif output_format.lower() == 'png':
-            save_kwargs['optimize'] = options.get('optimize', True)
-        elif output_format.lower() == 'webp':
-            save_kwargs['quality'] = options.get('quality', 80)
-            save_kwargs['method'] = 6  # Best compression
+        # Copy the defaults only when the caller overrides one of them
+        overrides = {key: options[key] for key in save_kwargs if key in options}
+        if save_kwargs is _SAVE_KW_JPEG and 'subsampling' not in options and overrides.get('quality', 0) >= 90:
+            overrides['subsampling'] = 0  # Keep full 4:4:4 chroma at high quality
+        elif save_kwargs is _SAVE_KW_WEBP and 'method' not in options and overrides.get('quality', 0) >= 85:
+            overrides['method'] = 6  # Best compression; ~5x slower, only worth it at high quality
+        if overrides:
+            save_kwargs = {**save_kwargs, **overrides}
         
-        # Map format names to PIL-compatible format names
-        format_map = {
-            'jpg': 'JPEG',
-            'jpeg': 'JPEG',
-            'png': 'PNG',
-            'gif': 'GIF',
-            'bmp': 'BMP',
-            'tiff': 'TIFF',
-            'webp': 'WEBP'
-        }
+        pil_format = _FORMAT_MAP.get(output_format, output_format.upper())
+        if image.width * image.height * len(image.getbands()) > _BUFFERED_SAVE_MAX_BYTES:
+            # Too large to hold encoded in memory; let Pillow stream to the file
+            image.save(output_path, format=pil_format, **save_kwargs)
+            return
         
-        pil_format = format_map.get(output_format.lower(), output_format.upper())
-        image.save(output_path, format=pil_format, **save_kwargs)
+        # Encode in memory, then write once instead of one write(2) per encoder chunk
+        buf = io.BytesIO()
+        image.save(buf, format=pil_format, **save_kwargs)
+        data = buf.getbuffer()
+        fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            written = 0
+            while written < len(data):
+                written += os.write(fd, data[written:])
+        finally:
+            data.release()
+            os.close(fd)
     
     def get_available_features(self) -> Dict[str, bool]:
         """Get information about available features."""
@@ -9,33 +9,33 @@ echo "DocSwap VPS Deployment Starting"
 echo "=========================================="
 
 # Update system
-echo "[1/15] Updating system packages..."
+echo "[1/16] Updating system packages..."
 sudo apt update && sudo apt upgrade -y
 
 # Install Python 3.9 and pip
-echo "[2/15] Installing Python 3.9..."
+echo "[2/16] Installing Python 3.9..."
 sudo apt install -y python3.9 python3.9-venv python3-pip git
 
 # Install nginx
-echo "[3/15] Installing nginx..."
+echo "[3/16] Installing nginx..."
 sudo apt install -y nginx
 
 # Install certbot for SSL
-echo "[4/15] Installing certbot..."
+echo "[4/16] Installing certbot..."
 sudo apt install -y certbot python3-certbot-nginx
 
 # Install LibreOffice (optional, for advanced conversions)
-echo "[5/15] Installing LibreOffice..."
+echo "[5/16] Installing LibreOffice..."
 sudo apt install -y libreoffice libreoffice-writer libreoffice-calc
 
 # Create application directory
-echo "[6/15] Setting up application directory..."
+echo "[6/16] Setting up application directory..."
 sudo mkdir -p /var/www/docswap
 sudo chown $USER:$USER /var/www/docswap
 cd /var/www/docswap
 
 # Clone repository
-echo "[7/15] Cloning repository..."
+echo "[7/16] Cloning repository..."
 if [ -d "/var/www/docswap/.git" ]; then
     echo "Repository already exists, pulling latest..."
     git pull origin main
@@ -44,17 +44,34 @@ else
 fi
 
 # Create Python virtual environment
-echo "[8/15] Creating Python virtual environment..."
+echo "[8/16] Creating Python virtual environment..."
 python3.9 -m venv venv
 
 # Activate virtual environment and install dependencies
-echo "[9/15] Installing Python dependencies..."
+echo "[9/16] Installing Python dependencies..."
 source venv/bin/activate
 pip install --upgrade pip
 pip install -r requirements.txt
 
+# Swap Pillow for Pillow-SIMD on x86_64 CPUs with AVX2 (same PIL API, faster resize/convert/encode).
+# The release is pinned to match requirements.txt's Pillow, so the API the app uses doesn't change.
+echo "[10/16] Installing Pillow-SIMD (AVX2 CPUs only)..."
+PILLOW_PIN="$(grep -i '^pillow==' requirements.txt)"
+PILLOW_SIMD_VERSION="10.1.0.post0"
+if [ "$(uname -m)" = "x86_64" ] && grep -q avx2 /proc/cpuinfo; then
+    echo "AVX2 detected, building Pillow-SIMD $PILLOW_SIMD_VERSION..."
+    sudo apt install -y build-essential python3.9-dev libjpeg-dev zlib1g-dev libtiff-dev libwebp-dev
+    pip uninstall -y pillow
+    if ! CC="cc -mavx2" pip install --no-cache-dir --force-reinstall "pillow-simd==$PILLOW_SIMD_VERSION"; then
+        echo "Pillow-SIMD build failed, reinstalling $PILLOW_PIN..."
+        pip install "$PILLOW_PIN"
+    fi
+else
+    echo "No AVX2 support, keeping $PILLOW_PIN"
+fi
+
 # Create .env file template
-echo "[10/15] Creating environment configuration..."
+echo "[11/16] Creating environment configuration..."
 cat > .env << 'ENVEOF'
 SECRET_KEY=CHANGE_THIS_SECRET_KEY_TO_RANDOM_STRING
 SUPABASE_URL=https://your-project.supabase.co
@@ -64,6 +81,7 @@ SUPABASE_JWT_SECRET=your-jwt-secret-here
 MAX_FILE_SIZE=104857600
 FILE_EXPIRY=86400
 RATE_LIMIT_PER_MINUTE=60
+TRUSTED_PROXY_HOPS=1
 FLASK_ENV=production
 UPLOAD_FOLDER=/var/www/docswap/uploads
 OUTPUT_FOLDER=/var/www/docswap/output
@@ -71,12 +89,12 @@ SESSIONS_FOLDER=/var/www/docswap/sessions
 ENVEOF
 
 # Create data directories
-echo "[11/15] Creating data directories..."
+echo "[12/16] Creating data directories..."
 mkdir -p uploads output sessions
 chmod 755 uploads output sessions
 
 # Create systemd service
-echo "[12/15] Creating systemd service..."
+echo "[13/16] Creating systemd service..."
 sudo tee /etc/systemd/system/docswap.service > /dev/null << SERVICEEOF
 [Unit]
 Description=DocSwap Flask Application
@@ -96,7 +114,7 @@ WantedBy=multi-user.target
 SERVICEEOF
 
 # Configure nginx
-echo "[13/15] Configuring nginx..."
+echo "[14/16] Configuring nginx..."
 sudo tee /etc/nginx/sites-available/docswap > /dev/null << 'NGINXEOF'
 server {
     listen 80;
@@ -129,11 +147,11 @@ sudo ln -sf /etc/nginx/sites-available/docswap /etc/nginx/sites-enabled/
 sudo rm -f /etc/nginx/sites-enabled/default
 
 # Test nginx configuration
-echo "[14/15] Testing nginx configuration..."
+echo "[15/16] Testing nginx configuration..."
 sudo nginx -t
 
 # Start services
-echo "[15/15] Starting services..."
+echo "[16/16] Starting services..."
 sudo systemctl daemon-reload
 sudo systemctl enable docswap
 sudo systemctl start docswap
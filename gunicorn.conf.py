@@ -9,8 +9,12 @@ bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
 backlog = 2048
 
 # Worker processes
-workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
-worker_class = os.getenv('WORKER_CLASS', 'gevent')
+# Conversions block in C extensions (PIL, pdf2image, libjpeg) that never yield to an
+# event loop, so use real OS threads: one worker per core, several threads each.
+# Pure-IO endpoints can run on a separate gevent instance via WORKER_CLASS=gevent.
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = os.getenv('WORKER_CLASS', 'gthread')
+threads = int(os.getenv('WORKER_THREADS', 4))
 worker_connections = 1000
 max_requests = int(os.getenv('MAX_REQUESTS', 1000))
 max_requests_jitter = int(os.getenv('MAX_REQUESTS_JITTER', 100))
@@ -21,7 +25,10 @@ keepalive = 2
 graceful_timeout = 30
 
 # Memory management
-preload_app = True
+# Not preloaded: Pillow/img2pdf caches are written on every request, so copy-on-write
+# pages would be unshared anyway, and max_requests recycling then really returns
+# each worker's memory.
+preload_app = False
 max_worker_memory = int(os.getenv('MEMORY_LIMIT_MB', 512)) * 1024 * 1024
 
 # Logging
@@ -87,6 +94,7 @@ max_requests_jitter = 100
 print(f"Gunicorn configuration loaded:")
 print(f"  Workers: {workers}")
 print(f"  Worker class: {worker_class}")
+print(f"  Threads per worker: {threads}")
 print(f"  Bind: {bind}")
 print(f"  Timeout: {timeout}s")
 print(f"  Max requests: {max_requests}")
\ No newline at end of file
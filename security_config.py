@@ -5,10 +5,34 @@ Production security settings and hardening configurations
 """
 
 import os
+import sys
 import secrets
 import hashlib
+import hmac
+import base64
+import binascii
+import zipfile
 from datetime import timedelta
 
+try:
+    import magic
+    # Building a Magic instance parses the magic database (~10ms), so do it once
+    _MAGIC = magic.Magic(mime=True)
+except ImportError:
+    _MAGIC = None
+
+# Every type we accept is identifiable from the first few bytes of the file
+_MAGIC_HEADER_SIZE = 4096
+# Main part each OOXML package must contain; the bare zip container proves nothing
+_OOXML_MAIN_PARTS = {
+    'docx': 'word/document.xml',
+    'xlsx': 'xl/workbook.xml',
+    'pptx': 'ppt/presentation.xml',
+}
+
+# Characters stripped from uploaded filenames
+_DANGEROUS_TABLE = str.maketrans('', '', '<>:"/\\|?*\x00')
+
 class SecurityConfig:
     """Production security configuration class"""
     
@@ -37,6 +61,7 @@ class SecurityConfig:
             "payment=(), usb=(), magnetometer=(), gyroscope=()"
         )
     }
+    _SECURITY_HEADER_ITEMS = tuple(SECURITY_HEADERS.items())
     
     # File Upload Security
     MAX_FILE_SIZE = int(os.environ.get('MAX_FILE_SIZE', 104857600))  # 100MB
@@ -106,6 +131,11 @@ class SecurityConfig:
         'LOG_RETENTION_DAYS': 30,
         'SENSITIVE_FIELDS': ['password', 'token', 'key', 'secret', 'auth']
     }
+
+    
+    # Password Hashing (scrypt n, r, p; 128*n*r bytes = 32MB per hash, above OpenSSL's default cap)
+    SCRYPT_PARAMS = (32768, 8, 1)
+    SCRYPT_MAXMEM = 64 * 1024 * 1024
     
     @staticmethod
     def generate_secret_key():
@@ -114,31 +144,44 @@ class SecurityConfig:
     
     @staticmethod
     def hash_password(password: str) -> str:
-        """Hash password using secure method"""
-        salt = secrets.token_hex(16)
-        password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
-        return f"{salt}:{password_hash.hex()}"
+        """Hash password with scrypt (memory-hard, unlike the legacy PBKDF2 format)"""
+        salt = secrets.token_bytes(16)
+        n, r, p = SecurityConfig.SCRYPT_PARAMS
+        password_hash = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                                       maxmem=SecurityConfig.SCRYPT_MAXMEM, dklen=32)
+        return (f"scrypt$n={n},r={r},p={p}$"
+                f"{base64.b64encode(salt).decode()}${base64.b64encode(password_hash).decode()}")
     
     @staticmethod
     def verify_password(password: str, hashed: str) -> bool:
-        """Verify password against hash"""
+        """Verify password against hash (scrypt, or legacy PBKDF2 salt:hash)"""
         try:
+            if hashed.startswith('scrypt$'):
+                _, params, salt, password_hash = hashed.split('$')
+                cost = dict(item.split('=') for item in params.split(','))
+                candidate = hashlib.scrypt(password.encode(), salt=base64.b64decode(salt),
+                                           n=int(cost['n']), r=int(cost['r']), p=int(cost['p']),
+                                           maxmem=SecurityConfig.SCRYPT_MAXMEM, dklen=32)
+                return hmac.compare_digest(candidate, base64.b64decode(password_hash))
             salt, password_hash = hashed.split(':')
-            return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000).hex() == password_hash
-        except ValueError:
+            candidate = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000).hex()
+            return hmac.compare_digest(candidate, password_hash)
+        except (ValueError, KeyError, binascii.Error):
             return False
     
     @staticmethod
     def sanitize_filename(filename: str) -> str:
         """Sanitize filename for security"""
-        import re
-        # Remove path separators and dangerous characters
-        filename = re.sub(r'[<>:"/\\|?*]', '', filename)
-        # Limit length
-        if len(filename) > SecurityConfig.FILESYSTEM_CONFIG['MAX_FILENAME_LENGTH']:
+        # Remove path separators, dangerous characters and NUL (path truncation)
+        filename = filename.translate(_DANGEROUS_TABLE)
+        # Limit length in bytes, which is what POSIX NAME_MAX counts
+        max_length = SecurityConfig.FILESYSTEM_CONFIG['MAX_FILENAME_LENGTH']
+        if len(os.fsencode(filename)) > max_length:
             name, ext = os.path.splitext(filename)
-            max_name_len = SecurityConfig.FILESYSTEM_CONFIG['MAX_FILENAME_LENGTH'] - len(ext)
-            filename = name[:max_name_len] + ext
+            max_name_len = max(max_length - len(os.fsencode(ext)), 0)
+            # Drop any multibyte character split by the cut
+            name = os.fsencode(name)[:max_name_len].decode(sys.getfilesystemencoding(), 'ignore')
+            filename = name + ext
         return filename
     
     @staticmethod
@@ -168,40 +211,56 @@ class SecurityConfig:
     @staticmethod
     def validate_file_type(file_path: str, expected_extension: str) -> bool:
         """Validate file type using magic numbers"""
-        try:
-            import magic
-            mime_type = magic.from_file(file_path, mime=True)
-            
-            # Define expected MIME types for extensions
-            mime_mapping = {
-                'pdf': 'application/pdf',
-                'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                'pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
-                'jpg': 'image/jpeg',
-                'jpeg': 'image/jpeg',
-                'png': 'image/png',
-                'gif': 'image/gif',
-                'bmp': 'image/bmp',
-                'tiff': 'image/tiff',
-                'webp': 'image/webp',
-                'txt': 'text/plain',
-                'html': 'text/html',
-                'csv': 'text/csv'
-            }
-            
-            expected_mime = mime_mapping.get(expected_extension.lower())
-            return mime_type == expected_mime if expected_mime else True
-            
-        except ImportError:
+        if _MAGIC is None:
             # Fallback if python-magic is not available
             return True
+        
+        # Define expected MIME types for extensions
+        mime_mapping = {
+            'pdf': 'application/pdf',
+            'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+            'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            'pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+            'jpg': 'image/jpeg',
+            'jpeg': 'image/jpeg',
+            'png': 'image/png',
+            'gif': 'image/gif',
+            'bmp': 'image/bmp',
+            'tiff': 'image/tiff',
+            'webp': 'image/webp',
+            'txt': 'text/plain',
+            'html': 'text/html',
+            'csv': 'text/csv'
+        }
+        
+        expected_extension = expected_extension.lower()
+        expected_mime = mime_mapping.get(expected_extension)
+        if not expected_mime:
+            return True
+        
+        with open(file_path, 'rb') as f:
+            mime_type = _MAGIC.from_buffer(f.read(_MAGIC_HEADER_SIZE))
+        
+        main_part = _OOXML_MAIN_PARTS.get(expected_extension)
+        if main_part:
+            # A header slice often only shows the shared zip container, so check the archive itself
+            if mime_type not in (expected_mime, 'application/zip'):
+                return False
+            try:
+                with zipfile.ZipFile(file_path) as archive:
+                    archive.getinfo(main_part)
+            except (zipfile.BadZipFile, KeyError):
+                return False
+            return True
+        
+        return mime_type == expected_mime
     
     @staticmethod
     def apply_security_headers(response):
         """Apply security headers to Flask response"""
-        for header, value in SecurityConfig.SECURITY_HEADERS.items():
-            response.headers[header] = value
+        # update() replaces any header a view already set, same as item assignment
+        response.headers.update(SecurityConfig._SECURITY_HEADER_ITEMS)
+        response.headers.pop('Server', None)
         return response
 
 def configure_flask_security(app):
@@ -215,16 +274,8 @@ def configure_flask_security(app):
     if not app.config.get('SECRET_KEY') or app.config['SECRET_KEY'] == 'dev-key-change-in-production':
         app.config['SECRET_KEY'] = SecurityConfig.generate_secret_key()
     
-    # Apply security headers to all responses
-    @app.after_request
-    def apply_security_headers(response):
-        return SecurityConfig.apply_security_headers(response)
-    
-    # Disable server header
-    @app.after_request
-    def remove_server_header(response):
-        response.headers.pop('Server', None)
-        return response
+    # Apply security headers and disable the server header on all responses
+    app.after_request(SecurityConfig.apply_security_headers)
     
     return app
 
@@ -4,18 +4,62 @@ Test script to verify the updated conversion functions work correctly.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import time
 import os
 
+try:
+    from requests_toolbelt.multipart.encoder import MultipartEncoder
+    TOOLBELT_AVAILABLE = True
+except ImportError:
+    TOOLBELT_AVAILABLE = False
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
 # Test configuration
 BASE_URL = "http://localhost:8000"
 TEST_SESSION_ID = "test-session-123"
 
+# One pooled keep-alive connection for every request instead of a new connection per call,
+# retrying transient server errors (honouring Retry-After) instead of failing the test outright.
+# Only GETs are retried: a resent upload or conversion POST could run twice, and a streamed
+# MultipartEncoder body can't be resent at all.
+SESSION = requests.Session()
+SESSION.mount('http://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 502, 503, 504],
+        respect_retry_after_header=True,
+        allowed_methods=frozenset(['GET'])
+    )
+))
+
+# (connect, read) seconds, so a stuck server fails the test instead of hanging it
+TIMEOUT = (5, 60)
+
+def read_json_field(response, field):
+    """Read one top-level field from a JSON response, streaming the body when ijson is available."""
+    if not IJSON_AVAILABLE:
+        return response.json().get(field)
+    try:
+        response.raw.decode_content = True
+        return next(ijson.items(response.raw, field), None)
+    finally:
+        response.close()
+
 def test_health():
     """Test if the server is healthy."""
     print("Testing server health...")
-    response = requests.get(f"{BASE_URL}/health")
+    response = SESSION.get(f"{BASE_URL}/health", timeout=TIMEOUT)
     if response.status_code == 200:
         print("✅ Server is healthy")
         return True
@@ -38,17 +82,27 @@ def test_upload_and_convert():
         # Upload the file
         print("Uploading test file...")
         with open(test_file_path, 'rb') as f:
-            files = {'file': ('test_document.txt', f, 'text/plain')}
-            data = {'sessionId': TEST_SESSION_ID}
-            
-            response = requests.post(f"{BASE_URL}/api/upload/public", files=files, data=data)
+            if TOOLBELT_AVAILABLE:
+                # Stream the multipart body in constant memory instead of building it up front
+                encoder = MultipartEncoder(fields={
+                    'file': ('test_document.txt', f, 'text/plain'),
+                    'sessionId': TEST_SESSION_ID
+                })
+                response = SESSION.post(f"{BASE_URL}/api/upload/public", data=encoder,
+                                        headers={'Content-Type': encoder.content_type},
+                                        stream=IJSON_AVAILABLE, timeout=TIMEOUT)
+            else:
+                files = {'file': ('test_document.txt', f, 'text/plain')}
+                data = {'sessionId': TEST_SESSION_ID}
+                
+                response = SESSION.post(f"{BASE_URL}/api/upload/public", files=files, data=data,
+                                        stream=IJSON_AVAILABLE, timeout=TIMEOUT)
         
         if response.status_code != 200:
             print(f"❌ Upload failed: {response.status_code} - {response.text}")
             return False
         
-        upload_result = response.json()
-        file_id = upload_result.get('fileId')
+        file_id = read_json_field(response, 'fileId')
         print(f"✅ File uploaded successfully. File ID: {file_id}")
         
         # Test conversion (text to PDF)
@@ -59,9 +113,10 @@ def test_upload_and_convert():
             'sessionId': TEST_SESSION_ID
         }
         
-        response = requests.post(f"{BASE_URL}/api/convert/public", 
-                               json=conversion_data,
-                               headers={'Content-Type': 'application/json'})
+        response = SESSION.post(f"{BASE_URL}/api/convert/public", 
+                              json=conversion_data,
+                              headers={'Content-Type': 'application/json'},
+                              timeout=TIMEOUT)
         
         if response.status_code == 200:
             result = response.json()
@@ -1,12 +1,40 @@
 # DocSwap - User Authentication API Endpoints
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request
+from flask import jsonify as flask_jsonify
 from supabase import create_client, Client
+import httpx
+import importlib.util
 import os
 import logging
+import base64
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
 import re
 
+try:
+    from jose import jwt, JWTError
+    JOSE_AVAILABLE = True
+except ImportError:
+    JOSE_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    # google-re2: linear-time DFA matching, no backtracking blow-up on crafted input
+    import re2 as _regex
+except ImportError:
+    _regex = re
+
 # Initialize logger
 logger = logging.getLogger(__name__)
 
@@ -14,6 +42,7 @@ logger = logging.getLogger(__name__)
 SUPABASE_URL = os.environ.get('SUPABASE_URL')
 SUPABASE_SERVICE_KEY = os.environ.get('SUPABASE_SERVICE_KEY')
 SUPABASE_ANON_KEY = os.environ.get('SUPABASE_ANON_KEY')
+SUPABASE_JWT_SECRET = os.environ.get('SUPABASE_JWT_SECRET')
 
 if not all([SUPABASE_URL, SUPABASE_SERVICE_KEY, SUPABASE_ANON_KEY]):
     logger.error("Missing required Supabase environment variables for user auth")
@@ -22,11 +51,181 @@ if not all([SUPABASE_URL, SUPABASE_SERVICE_KEY, SUPABASE_ANON_KEY]):
 # Create Supabase client for admin operations
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
 
+# Pooled client for the anon-key GoTrue endpoints (login, refresh, current user). Calling
+# the REST API directly skips the SDK's per-call model building; every call passes its own
+# credentials or token, so the client holds no session state. HTTP/2 needs the h2 package.
+auth_api = httpx.Client(
+    base_url=f"{SUPABASE_URL}/auth/v1",
+    headers={'apikey': SUPABASE_ANON_KEY},
+    http2=importlib.util.find_spec('h2') is not None,
+    timeout=10.0,
+    limits=httpx.Limits(max_keepalive_connections=100, keepalive_expiry=60)
+)
+
+def _session_payload(session):
+    """Session fields returned to the client from a GoTrue token response"""
+    return {
+        'access_token': session.get('access_token'),
+        'refresh_token': session.get('refresh_token'),
+        'expires_at': session.get('expires_at')
+    }
+
 # Create Blueprint for user authentication routes
 auth_bp = Blueprint('auth', __name__)
 
+if ORJSON_AVAILABLE:
+    # Datetimes and dataclasses are passed to the app's default() so they serialize as
+    # flask.jsonify would (HTTP dates, asdict), not orjson's native ISO form
+    _ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                       | orjson.OPT_PASSTHROUGH_DATACLASS)
+
+def jsonify(payload):
+    """
+    flask.jsonify for this blueprint's responses, encoded with orjson when installed.
+    
+    Scoped to these handlers on purpose: the app's JSON provider is left alone, so
+    other routes and request parsing keep Flask's encoder.
+    """
+    if not ORJSON_AVAILABLE:
+        return flask_jsonify(payload)
+    provider = current_app.json
+    option = _ORJSON_OPTIONS | (orjson.OPT_SORT_KEYS if provider.sort_keys else 0)
+    return Response(orjson.dumps(payload, default=provider.default, option=option) + b'\n',
+                    mimetype=provider.mimetype)
+
+# Per-IP token bucket in front of the credential endpoints, so brute-force traffic
+# is rejected locally instead of costing a Supabase round trip
+RATE_LIMIT_CAPACITY = 10
+RATE_LIMIT_PER_SECOND = 5.0
+RATE_LIMITED_ENDPOINTS = frozenset({'auth.login_user', 'auth.register_user'})
+_MAX_RATE_BUCKETS = 10000
+_rate_buckets = {}  # remote address -> (tokens, last refill time)
+_rate_lock = threading.Lock()
+
+@auth_bp.before_request
+def rate_limit_auth():
+    """Reject requests from an address whose token bucket is empty"""
+    if request.endpoint not in RATE_LIMITED_ENDPOINTS:
+        return None
+    
+    # remote_addr, never the client-supplied leftmost X-Forwarded-For entry, which an
+    # attacker could vary per request to get a fresh bucket. Behind a proxy, app.py wraps
+    # wsgi_app in ProxyFix(x_for=TRUSTED_PROXY_HOPS) so remote_addr is the hop it appended.
+    key = request.remote_addr or 'unknown'
+    now = time.monotonic()
+    with _rate_lock:
+        tokens, last = _rate_buckets.get(key, (RATE_LIMIT_CAPACITY, now))
+        tokens = min(RATE_LIMIT_CAPACITY, tokens + (now - last) * RATE_LIMIT_PER_SECOND)
+        if tokens < 1:
+            _rate_buckets[key] = (tokens, now)
+            retry_after = math.ceil((1 - tokens) / RATE_LIMIT_PER_SECOND)
+            response = jsonify({'error': 'Too many requests'})
+            response.headers['Retry-After'] = str(retry_after)
+            return response, 429
+        
+        if key not in _rate_buckets and len(_rate_buckets) >= _MAX_RATE_BUCKETS:
+            # Buckets idle long enough to have refilled carry no state; drop them
+            full_after = RATE_LIMIT_CAPACITY / RATE_LIMIT_PER_SECOND
+            for stale in [k for k, (_, t) in _rate_buckets.items() if now - t >= full_after]:
+                del _rate_buckets[stale]
+        _rate_buckets[key] = (tokens - 1, now)
+    return None
+
+# Short-lived token -> user cache for /api/auth/user, keyed by a digest so raw tokens are not held.
+# An entry never outlives its token's exp claim. The cache is per process: logout evicts the entry
+# in the worker that handled it, but other workers can keep answering for a revoked token until
+# their entry expires, up to USER_CACHE_TTL.
+USER_CACHE_TTL = 60
+_USER_CACHE_MAX = 10000
+_user_cache = OrderedDict()  # sha256(access token) -> (expires at, token exp, user dict)
+_user_cache_lock = threading.Lock()
+
+def _token_key(access_token):
+    return hashlib.sha256(access_token.encode()).digest()
+
+def _token_exp(access_token):
+    """
+    Return a JWT's exp claim (epoch seconds) without verifying the token, or None.
+    
+    Only used to cut short the caching of a token Supabase has already accepted.
+    """
+    try:
+        payload = access_token.split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        exp = claims.get('exp')
+    except (IndexError, ValueError, AttributeError):
+        return None
+    if isinstance(exp, bool) or not isinstance(exp, (int, float)):
+        return None
+    return exp
+
+def _get_cached_user(key):
+    """Return the cached user for a token digest, or None if missing, expired or past the token's exp"""
+    now = time.monotonic()
+    with _user_cache_lock:
+        entry = _user_cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now or entry[1] <= time.time():
+            del _user_cache[key]
+            return None
+        _user_cache.move_to_end(key)
+        return entry[2]
+
+def _cache_user(key, user, token_exp):
+    """Cache a user for up to USER_CACHE_TTL seconds, and never past the token's exp"""
+    if token_exp is None:
+        return
+    ttl = min(USER_CACHE_TTL, token_exp - time.time())
+    if ttl <= 0:
+        return
+    with _user_cache_lock:
+        _user_cache[key] = (time.monotonic() + ttl, token_exp, user)
+        _user_cache.move_to_end(key)
+        while len(_user_cache) > _USER_CACHE_MAX:
+            _user_cache.popitem(last=False)
+
+def _forget_user(key):
+    """Evict a token's cached user from this process only"""
+    with _user_cache_lock:
+        _user_cache.pop(key, None)
+
+# User fields an access token's own claims can answer without asking Supabase
+TOKEN_USER_FIELDS = frozenset({'id', 'email', 'expires_at'})
+
+def _verify_token_locally(access_token):
+    """
+    Return the claims of a Supabase access token signed with the project JWT secret, or None.
+    
+    Only the signature and expiry are checked; a token revoked by logout still verifies
+    here until its own exp claim passes.
+    """
+    if not (JOSE_AVAILABLE and SUPABASE_JWT_SECRET):
+        return None
+    try:
+        return jwt.decode(access_token, SUPABASE_JWT_SECRET, algorithms=['HS256'], audience='authenticated')
+    except JWTError:
+        # Expired, tampered or signed with another key: let Supabase give the verdict
+        return None
+
 # Email validation pattern
-EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+EMAIL_PATTERN = _regex.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+def extract_bearer(req):
+    """Return the token from an 'Authorization: Bearer <token>' header, or None"""
+    auth_header = req.headers.get('Authorization')
+    if auth_header and auth_header[:7] == 'Bearer ':
+        return auth_header[7:]
+    return None
+
+# Longest password bcrypt can hash without truncation
+MAX_PASSWORD_BYTES = 72
+
+def normalize_email(value):
+    """Return the email stripped and lowercased, or '' if it is missing or not a string"""
+    if not isinstance(value, str):
+        return ''
+    return value.strip().lower()
 
 @auth_bp.route('/api/auth/register', methods=['POST'])
 def register_user():
@@ -37,29 +236,25 @@ def register_user():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
-        email = data.get('email', '').strip().lower()
+        raw_email = data.get('email')
         password = data.get('password', '')
         
-        # Validate input
-        if not email or not password:
+        # Validate input, cheapest checks first
+        if not raw_email or not password:
             return jsonify({'error': 'Email and password are required'}), 400
         
-        if not EMAIL_PATTERN.match(email):
-            return jsonify({'error': 'Invalid email format'}), 400
-        
         if len(password) < 8:
             return jsonify({'error': 'Password must be at least 8 characters long'}), 400
         
-        # Check if user already exists
-        try:
-            existing_user = supabase.auth.admin.get_user_by_email(email)
-            if existing_user.user:
-                return jsonify({'error': 'User already exists with this email'}), 409
-        except Exception:
-            # User doesn't exist, which is what we want
-            pass
+        # bcrypt only uses the first 72 bytes, and Supabase rejects longer passwords anyway
+        if len(password.encode()) > MAX_PASSWORD_BYTES:
+            return jsonify({'error': f'Password must be at most {MAX_PASSWORD_BYTES} bytes long'}), 400
         
-        # Create user with Supabase Auth
+        email = normalize_email(raw_email)
+        if not EMAIL_PATTERN.match(email):
+            return jsonify({'error': 'Invalid email format'}), 400
+        
+        # Create user with Supabase Auth (it rejects duplicate emails itself, no pre-check needed)
         try:
             response = supabase.auth.admin.create_user({
                 "email": email,
@@ -68,7 +263,7 @@ def register_user():
             })
             
             if response.user:
-                logger.info(f"User registered successfully: {email}")
+                logger.info("User registered successfully: %s", email)
                 return jsonify({
                     'message': 'User registered successfully',
                     'user': {
@@ -78,15 +273,17 @@ def register_user():
                     }
                 }), 201
             else:
-                logger.error(f"Failed to create user: {email}")
+                logger.error("Failed to create user: %s", email)
                 return jsonify({'error': 'Failed to create user'}), 500
                 
         except Exception as e:
-            logger.error(f"Supabase registration error: {str(e)}")
+            if "already registered" in str(e) or "already been registered" in str(e):
+                return jsonify({'error': 'User already exists with this email'}), 409
+            logger.error("Supabase registration error: %s", e)
             return jsonify({'error': 'Registration failed'}), 500
         
     except Exception as e:
-        logger.error(f"Registration endpoint error: {str(e)}")
+        logger.error("Registration endpoint error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @auth_bp.route('/api/auth/login', methods=['POST'])
@@ -98,79 +295,74 @@ def login_user():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
-        email = data.get('email', '').strip().lower()
+        raw_email = data.get('email')
         password = data.get('password', '')
         
         # Validate input
-        if not email or not password:
+        if not raw_email or not password:
             return jsonify({'error': 'Email and password are required'}), 400
         
+        email = normalize_email(raw_email)
         if not EMAIL_PATTERN.match(email):
             return jsonify({'error': 'Invalid email format'}), 400
         
         # Attempt to sign in with Supabase
         try:
             # Use anon key for client-side authentication
-            client_supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-            response = client_supabase.auth.sign_in_with_password({
-                "email": email,
-                "password": password
-            })
+            response = auth_api.post('/token', params={'grant_type': 'password'},
+                                     json={'email': email, 'password': password})
             
-            if response.user and response.session:
-                logger.info(f"User logged in successfully: {email}")
+            if response.status_code == 200:
+                session = response.json()
+                user = session.get('user') or {}
+                logger.info("User logged in successfully: %s", email)
                 return jsonify({
                     'message': 'Login successful',
                     'user': {
-                        'id': response.user.id,
-                        'email': response.user.email,
-                        'last_sign_in_at': response.user.last_sign_in_at
+                        'id': user.get('id'),
+                        'email': user.get('email'),
+                        'last_sign_in_at': user.get('last_sign_in_at')
                     },
-                    'session': {
-                        'access_token': response.session.access_token,
-                        'refresh_token': response.session.refresh_token,
-                        'expires_at': response.session.expires_at
-                    }
+                    'session': _session_payload(session)
                 }), 200
+            elif "Invalid login credentials" in response.text:
+                return jsonify({'error': 'Invalid email or password'}), 401
             else:
-                return jsonify({'error': 'Invalid credentials'}), 401
+                logger.error("Supabase login error: %s %s", response.status_code, response.text)
+                return jsonify({'error': 'Login failed'}), 500
                 
         except Exception as e:
-            logger.error(f"Supabase login error: {str(e)}")
+            logger.error("Supabase login error: %s", e)
             if "Invalid login credentials" in str(e):
                 return jsonify({'error': 'Invalid email or password'}), 401
             return jsonify({'error': 'Login failed'}), 500
         
     except Exception as e:
-        logger.error(f"Login endpoint error: {str(e)}")
+        logger.error("Login endpoint error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @auth_bp.route('/api/auth/logout', methods=['POST'])
 def logout_user():
     """Logout user and invalidate session"""
     try:
-        # Get the authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
+        access_token = extract_bearer(request)
+        if not access_token:
             return jsonify({'error': 'No valid session found'}), 401
         
-        access_token = auth_header.split(' ')[1]
-        
-        # Create client with the user's access token
-        client_supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-        
-        # Sign out the user
+        # Sign out the user by revoking the session behind their access token
         try:
-            response = client_supabase.auth.sign_out()
+            supabase.auth.admin.sign_out(access_token)
+            # Only this worker's cache; see USER_CACHE_TTL
+            _forget_user(_token_key(access_token))
             logger.info("User logged out successfully")
             return jsonify({'message': 'Logout successful'}), 200
             
         except Exception as e:
-            logger.error(f"Supabase logout error: {str(e)}")
+            logger.error("Supabase logout error: %s", e)
             return jsonify({'error': 'Logout failed'}), 500
         
     except Exception as e:
-        logger.error(f"Logout endpoint error: {str(e)}")
+        logger.error("Logout endpoint error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @auth_bp.route('/api/auth/refresh', methods=['POST'])
@@ -187,65 +379,79 @@ def refresh_token():
         if not refresh_token:
             return jsonify({'error': 'Refresh token is required'}), 400
         
-        # Create client and refresh session
+        # Refresh session
         try:
-            client_supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-            response = client_supabase.auth.refresh_session(refresh_token)
+            response = auth_api.post('/token', params={'grant_type': 'refresh_token'},
+                                     json={'refresh_token': refresh_token})
             
-            if response.session:
+            if response.status_code == 200:
                 logger.info("Token refreshed successfully")
                 return jsonify({
                     'message': 'Token refreshed successfully',
-                    'session': {
-                        'access_token': response.session.access_token,
-                        'refresh_token': response.session.refresh_token,
-                        'expires_at': response.session.expires_at
-                    }
+                    'session': _session_payload(response.json())
                 }), 200
             else:
-                return jsonify({'error': 'Failed to refresh token'}), 401
+                logger.error("Token refresh error: %s %s", response.status_code, response.text)
+                return jsonify({'error': 'Token refresh failed'}), 401
                 
         except Exception as e:
-            logger.error(f"Token refresh error: {str(e)}")
+            logger.error("Token refresh error: %s", e)
             return jsonify({'error': 'Token refresh failed'}), 401
         
     except Exception as e:
-        logger.error(f"Refresh endpoint error: {str(e)}")
+        logger.error("Refresh endpoint error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @auth_bp.route('/api/auth/user', methods=['GET'])
 def get_current_user():
     """Get current authenticated user information"""
     try:
-        # Get the authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
+        access_token = extract_bearer(request)
+        if not access_token:
             return jsonify({'error': 'Authentication required'}), 401
         
-        access_token = auth_header.split(' ')[1]
-        
-        # Create client and get user
-        try:
-            client_supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-            response = client_supabase.auth.get_user(access_token)
-            
-            if response.user:
+        # Callers asking only for token fields (?fields=id,email) are answered from the verified claims.
+        # This path doesn't see logout: a signed-out token is answered until it expires.
+        fields = request.args.get('fields')
+        if fields and set(fields.split(',')) <= TOKEN_USER_FIELDS:
+            claims = _verify_token_locally(access_token)
+            if claims is not None:
                 return jsonify({
                     'user': {
-                        'id': response.user.id,
-                        'email': response.user.email,
-                        'created_at': response.user.created_at,
-                        'last_sign_in_at': response.user.last_sign_in_at,
-                        'email_confirmed_at': response.user.email_confirmed_at
+                        'id': claims.get('sub'),
+                        'email': claims.get('email'),
+                        'expires_at': claims.get('exp')
                     }
                 }), 200
+        
+        token_key = _token_key(access_token)
+        user = _get_cached_user(token_key)
+        if user is not None:
+            return jsonify({'user': user}), 200
+        
+        # Get user
+        try:
+            response = auth_api.get('/user', headers={'Authorization': f'Bearer {access_token}'})
+            
+            if response.status_code == 200:
+                data = response.json()
+                user = {
+                    'id': data.get('id'),
+                    'email': data.get('email'),
+                    'created_at': data.get('created_at'),
+                    'last_sign_in_at': data.get('last_sign_in_at'),
+                    'email_confirmed_at': data.get('email_confirmed_at')
+                }
+                _cache_user(token_key, user, _token_exp(access_token))
+                return jsonify({'user': user}), 200
             else:
-                return jsonify({'error': 'User not found'}), 404
+                logger.error("Get user error: %s %s", response.status_code, response.text)
+                return jsonify({'error': 'Failed to get user information'}), 401
                 
         except Exception as e:
-            logger.error(f"Get user error: {str(e)}")
+            logger.error("Get user error: %s", e)
             return jsonify({'error': 'Failed to get user information'}), 401
         
     except Exception as e:
-        logger.error(f"Get user endpoint error: {str(e)}")
+        logger.error("Get user endpoint error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
\ No newline at end of file
@@ -1,10 +1,28 @@
 #!/usr/bin/env python3
+import hmac
 import os
 import sys
-from dotenv import load_dotenv
+
+def _load_dotenv(path=os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')):
+    """Load KEY=VALUE lines from .env without overriding the environment (stdlib stand-in for python-dotenv)."""
+    if not os.path.exists(path):
+        return
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, _, value = line.partition('=')
+            key = key.strip()
+            if key.startswith('export '):
+                key = key[len('export '):].strip()
+            value = value.strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+                value = value[1:-1]
+            os.environ.setdefault(key, value)
 
 # Load environment variables
-load_dotenv()
+_load_dotenv()
 
 # Get admin credentials
 admin_username = os.getenv('ADMIN_USERNAME', 'admin')
@@ -22,8 +40,9 @@ print(f"\nTesting login with:")
 print(f"Test Username: '{test_username}'")
 print(f"Test Password: '{test_password}'")
 
-username_match = test_username == admin_username
-password_match = test_password == admin_password
+# Constant-time comparison, so the time taken does not reveal how much of the credential matched
+username_match = hmac.compare_digest(test_username.encode(), admin_username.encode())
+password_match = hmac.compare_digest(test_password.encode(), admin_password.encode())
 
 print(f"\nResults:")
 print(f"Username match: {username_match}")